@@ -0,0 +1,81 @@
+import os
+import unittest
+from test.utils.aio import AsyncSqlQueriesTestCaseMixin
+from test.utils.database import *
+from test.utils.generic_data import (
+    COURSES, DEPARTMENTS, INSTRUCTORS, STUDENTS
+)
+
+
+class AsyncTestCase(
+        unittest.IsolatedAsyncioTestCase,
+        AsyncSqlQueriesTestCaseMixin
+):
+    table = "students_per_department"
+    query = """
+    SET search_path TO A2;
+    CREATE TABLE students_per_department AS
+        SELECT dcode, count(*) AS students FROM student GROUP BY dcode;
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the threads of the test case."""
+        cls._shutdown_executor()
+
+    def setUp(self):
+        """Connect to the database and isolate the test from the others."""
+        db.connect()
+        self._begin_isolation()
+
+    def tearDown(self):
+        """Undo everything the test did and disconnect."""
+        self._end_isolation()
+        db.close()
+
+    async def test_create_instances_concurrently(self):
+        await self._create_instances_concurrently([
+            (Department, DEPARTMENTS),
+            (Student, STUDENTS),
+            (Instructor, INSTRUCTORS),
+            (Course, COURSES),
+        ])
+
+        self.assertEqual(Student.select().count(), len(STUDENTS))
+        self.assertEqual(Instructor.select().count(), len(INSTRUCTORS))
+        self.assertEqual(Course.select().count(), len(COURSES))
+        self._execute_query()
+        self._assert_records_equal(self._get_generated_table(), [
+            {"dcode": "CSC", "students": 4},
+            {"dcode": "MGM", "students": 1},
+            {"dcode": "AST", "students": 2},
+        ])
+
+    async def test_scenarios(self):
+        self._create_instances(Department, DEPARTMENTS)
+
+        results = await self._run_scenarios([
+            [(Department, DEPARTMENTS), (Student, STUDENTS[:3])],
+            [(Department, DEPARTMENTS), (Student, STUDENTS)],
+            [(Department, DEPARTMENTS)],
+        ])
+
+        self.assertEqual(len(results), 3)
+        self._assert_records_equal(results[0], [
+            {"dcode": "CSC", "students": 3},
+        ])
+        self._assert_records_equal(results[1], [
+            {"dcode": "CSC", "students": 4},
+            {"dcode": "MGM", "students": 1},
+            {"dcode": "AST", "students": 2},
+        ])
+        self.assertEqual(results[2], [])
+        # The test's own tables are untouched, and no copy of the schema left
+        self.assertEqual(Department.select().count(), len(DEPARTMENTS))
+        self.assertEqual(Student.select().count(), 0)
+        leftover = db.execute_sql(
+            "SELECT count(*) FROM pg_namespace WHERE nspname LIKE %s",
+            (f"%\\_{os.getpid()}",)
+        ).fetchone()[0]
+        self.assertEqual(leftover, 0)
+
@@ -0,0 +1,62 @@
+import unittest
+from test.utils.mixins import *
+from test.utils.generic_data import DEPARTMENTS, STUDENTS
+
+
+class BatchTestCase(unittest.TestCase, SqlQueriesTestCaseMixin):
+    table = "students_per_department"
+    query = """
+    SET search_path TO A2;
+    CREATE TABLE students_per_department AS
+        SELECT dcode, count(*) AS students FROM student GROUP BY dcode;
+    """
+
+    baseline = [
+        (Department, DEPARTMENTS),
+        (Student, STUDENTS[:3]),
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Connect to the database and create the shared fixtures."""
+        cls._load_baseline()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared fixtures and disconnect from the database."""
+        cls._unload_baseline()
+
+    def setUp(self):
+        """Isolate the test from the others."""
+        self._begin_isolation()
+
+    def tearDown(self):
+        """Undo everything the test did."""
+        self._end_isolation()
+
+    def test_scenarios(self):
+        results = self._run_batch([
+            [],
+            [(Student, STUDENTS[3:])],
+        ])
+
+        self.assertEqual(len(results), 2)
+        self._assert_records_equal(results[0], [
+            {"dcode": "CSC", "students": 3},
+        ])
+        self._assert_records_equal(results[1], [
+            {"dcode": "CSC", "students": 4},
+            {"dcode": "MGM", "students": 1},
+            {"dcode": "AST", "students": 2},
+        ])
+
+    def test_batch_leaves_the_test_untouched(self):
+        search_path = db.execute_sql("SHOW search_path").fetchone()[0]
+
+        self._run_batch([[(Student, STUDENTS[3:])]])
+
+        self.assertEqual(
+            db.execute_sql("SHOW search_path").fetchone()[0], search_path
+        )
+        self.assertEqual(Student.select().count(), 3)
+        self.assertEqual(self._run_batch([]), [])
@@ -0,0 +1,120 @@
+import tempfile
+import unittest
+
+from unittest import mock
+from test.utils import cache, mixins
+from test.utils.mixins import *
+from test.utils.generic_data import DEPARTMENTS, STUDENTS
+
+QUERY = """
+SET search_path TO A2;
+CREATE TABLE students_per_department AS
+    SELECT dcode, count(*) AS students FROM student GROUP BY dcode;
+"""
+
+
+class StudentsPerDepartment(SqlQueriesTestCaseMixin):
+    """
+    A cached test case of a query over `students`, whose test records in
+    `outcomes` whether the generated table was replayed from the cache,
+    its rows, and whether the search_path is the one it started with.
+    """
+    table = "students_per_department"
+    query = QUERY
+    cache_results = True
+    baseline = [(Department, DEPARTMENTS)]
+    students = STUDENTS
+    outcomes = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls._load_baseline()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._unload_baseline()
+
+    def setUp(self):
+        self._begin_isolation()
+
+    def tearDown(self):
+        self._end_isolation()
+
+    def test_query(self):
+        search_path = db.execute_sql("SHOW search_path").fetchone()[0]
+        self._create_instances(Student, self.students)
+        self._execute_query()
+
+        table = f"{BaseModel._meta.schema}.{self.table}"
+        exists = db.execute_sql("SELECT to_regclass(%s)", (table,))
+        self.outcomes.append({
+            "hit": exists.fetchone()[0] is None,
+            "rows": sorted(
+                self._get_generated_table(), key=lambda row: row["dcode"]
+            ),
+            "search_path": db.execute_sql("SHOW search_path").fetchone()[0]
+            == search_path,
+        })
+
+
+class ResultCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.result_cache = cache.ResultCache(directory.name)
+        patcher = mock.patch.object(mixins, "result_cache", self.result_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, **attributes):
+        """
+        Runs the test of `StudentsPerDepartment` with `attributes` set on
+        it, and returns its outcome.
+        """
+        class Case(StudentsPerDepartment, unittest.TestCase):
+            pass
+        for name, value in attributes.items():
+            setattr(Case, name, value)
+        Case.outcomes = []
+        # Read the DDL afresh, as the first test of a run does, so that a
+        # cached test (which runs no query) would show a leaked search_path
+        cache._schema_ddl.clear()
+        result = unittest.TestResult()
+        unittest.defaultTestLoader.loadTestsFromTestCase(Case).run(result)
+        self.assertTrue(result.wasSuccessful(), result.errors)
+        return Case.outcomes[0]
+
+    def test_hits_and_misses(self):
+        first = self._run()
+        self.assertFalse(first["hit"])
+        self.assertEqual(len(first["rows"]), 3)
+        self.assertEqual(len(self.result_cache), 1)
+
+        second = self._run()
+        self.assertTrue(second["hit"])
+        self.assertEqual(second["rows"], first["rows"])
+
+        # Only the layout and comments of the query differ
+        relaid = self._run(query="-- Same query\n" + QUERY.replace("\n", " "))
+        self.assertTrue(relaid["hit"])
+
+        for outcome in (second, relaid):
+            self.assertTrue(outcome["search_path"])
+
+    def test_changes_miss(self):
+        self._run()
+
+        fewer = self._run(students=STUDENTS[:3])
+        self.assertFalse(fewer["hit"])
+        self.assertEqual(fewer["rows"], [{"dcode": "CSC", "students": 3}])
+
+        changed = self._run(query=QUERY.replace("count(*)", "count(age)"))
+        self.assertFalse(changed["hit"])
+        self.assertEqual(len(self.result_cache), 3)
+
+    def test_invalidate(self):
+        self._run()
+        self.assertEqual(self.result_cache.invalidate(), 1)
+
+        self.assertFalse(self._run()["hit"])
@@ -0,0 +1,16 @@
+import unittest
+
+from test import test_q1
+from test.utils.incremental import fingerprint
+
+
+class FingerprintTestCase(unittest.TestCase):
+
+    def test_class_without_source(self):
+        base = test_q1.QueryOneTestCase
+        case = type("DynamicTestCase", (base,), {})
+        changed = type("DynamicTestCase", (base,), {"query": "SELECT 1"})
+
+        self.assertEqual(fingerprint(case, ""), fingerprint(case, ""))
+        self.assertNotEqual(fingerprint(case, ""), fingerprint(changed, ""))
+        self.assertNotEqual(fingerprint(case, ""), fingerprint(base, ""))
@@ -0,0 +1,55 @@
+import unittest
+
+from test.utils.database import *
+from test.utils.ingest import CopyStream
+
+
+class CopyStreamTestCase(unittest.TestCase):
+
+    def test_encoding(self):
+        stream = CopyStream(Student, [
+            {"sid": 1, "slastname": "Tang", "sfirstname": "Al\tvin",
+             "sex": "M", "age": 20, "dcode": "CSC", "yearofstudy": 2},
+            {"sid": 2, "slastname": "Back\\slash", "sfirstname": "New\nline",
+             "sex": "F", "age": 21, "dcode": None, "yearofstudy": 3},
+        ])
+
+        # CHAR(20) values are padded before their tabs, newlines and
+        # backslashes are escaped
+        self.assertEqual(stream.read(), "".join([
+            "1\t", "Tang".ljust(20), "\t", "Al\\t" + "vin".ljust(17),
+            "\tM\t20\tCSC\t2\n",
+            "2\t", "Back\\\\" + "slash".ljust(15), "\t",
+            "New\\n" + "line".ljust(16), "\tF\t21\t\\N\t3\n",
+        ]))
+        self.assertEqual(stream.rows_encoded, 2)
+
+    def test_decimals_and_defaults(self):
+        stream = CopyStream(StudentCourse, [
+            {"sid": 1, "csid": 2, "grade": 80.3},
+            {"sid": 1, "csid": 3},
+        ])
+
+        self.assertEqual(stream.read(), "1\t2\t80.30\n1\t3\t0.00\n")
+
+    def test_reads_lazily_in_chunks(self):
+        def rows():
+            for sid in range(3):
+                yield {"sid": sid, "csid": 1, "grade": 50}
+
+        stream = CopyStream(StudentCourse, rows())
+        chunks = [stream.read(5)]
+        self.assertEqual(stream.rows_encoded, 1)
+        while chunks[-1]:
+            chunks.append(stream.read(5))
+
+        self.assertEqual(
+            "".join(chunks), "0\t1\t50.00\n1\t1\t50.00\n2\t1\t50.00\n"
+        )
+        self.assertTrue(all(len(chunk) <= 5 for chunk in chunks))
+
+    def test_copy_statement(self):
+        self.assertEqual(
+            CopyStream(Department, [], schema="a2_copy").copy_statement(),
+            'COPY "a2_copy"."department" ("dcode", "dname") FROM STDIN'
+        )
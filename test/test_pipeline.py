@@ -0,0 +1,102 @@
+import unittest
+from test.utils.mixins import *
+from test.utils.generic_data import DEPARTMENTS, STUDENTS
+
+
+class StudentsPerDepartment(SqlQueriesTestCaseMixin):
+    """
+    A test case of a query over students, with or without the departments
+    as a baseline, whose tests record the rows they generated in `rows`.
+    """
+    table = "students_per_department"
+    query = """
+    SET search_path TO A2;
+    CREATE TABLE students_per_department AS
+        SELECT dcode, count(*) AS students FROM student GROUP BY dcode;
+    """
+    rows = None
+
+    @classmethod
+    def setUpClass(cls):
+        if cls.baseline:
+            cls._load_baseline()
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.baseline:
+            cls._unload_baseline()
+
+    def setUp(self):
+        if not self.baseline:
+            db.connect()
+            self._create_instances(Department, DEPARTMENTS)
+        self._begin_isolation()
+
+    def tearDown(self):
+        self._end_isolation()
+        if not self.baseline:
+            db.close()
+
+    def _create_and_query(self, students):
+        self._create_instances(Student, students)
+        self._execute_query()
+        self.rows[self._testMethodName] = sorted(
+            self._get_generated_table(), key=lambda row: row["dcode"]
+        )
+
+    def test_all_students(self):
+        self._create_and_query(STUDENTS)
+
+    def test_some_students(self):
+        self._create_and_query(STUDENTS[3:5])
+
+    def test_duplicate_student(self):
+        self._create_and_query([STUDENTS[0], STUDENTS[0]])
+
+
+def _run(pipeline_statements: bool, baseline: bool) -> unittest.TestResult:
+    """
+    Runs the tests of `StudentsPerDepartment` with or without pipelining
+    and a baseline, and returns their result (its rows in `result.rows`).
+    """
+    class Case(StudentsPerDepartment, unittest.TestCase):
+        pass
+    Case.pipeline_statements = pipeline_statements
+    Case.baseline = [(Department, DEPARTMENTS)] if baseline else []
+    Case.rows = {}
+    result = unittest.TestResult()
+    unittest.defaultTestLoader.loadTestsFromTestCase(Case).run(result)
+    result.rows = Case.rows
+    return result
+
+
+class PipelineStatementsTestCase(unittest.TestCase):
+
+    def test_same_rows_as_immediate_creation(self):
+        for baseline in (True, False):
+            with self.subTest(baseline=baseline):
+                immediate = _run(False, baseline)
+                pipelined = _run(True, baseline)
+
+                self.assertEqual(
+                    sorted(immediate.rows),
+                    ["test_all_students", "test_some_students"]
+                )
+                self.assertEqual(pipelined.rows, immediate.rows)
+
+    def test_failing_fixture_reported_against_its_test(self):
+        for pipeline_statements in (False, True):
+            for baseline in (True, False):
+                with self.subTest(
+                        pipeline_statements=pipeline_statements,
+                        baseline=baseline
+                ):
+                    result = _run(pipeline_statements, baseline)
+
+                    self.assertEqual(result.testsRun, 3)
+                    self.assertEqual(result.failures, [])
+                    self.assertEqual(
+                        [test._testMethodName for test, _ in result.errors],
+                        ["test_duplicate_student"]
+                    )
+                    self.assertIn("IntegrityError", result.errors[0][1])
@@ -0,0 +1,37 @@
+import unittest
+from test.utils.database import *
+from test.utils.snapshots import use_database
+
+
+@unittest.skipUnless(POOL_CONNECTIONS, "Connections are not pooled")
+class PooledPostgresqlDatabaseTestCase(unittest.TestCase):
+
+    def test_session_state_reset_on_reuse(self):
+        with db.connection_context():
+            pid = db.connection().get_backend_pid()
+            name = db.execute_sql("SHOW application_name").fetchone()[0]
+            db.execute_sql("SET application_name TO 'pooled'")
+            db.execute_sql("CREATE TEMPORARY TABLE pooled (id integer)")
+        hits = db.pool_stats.hits
+
+        with db.connection_context():
+            self.assertEqual(db.connection().get_backend_pid(), pid)
+            self.assertEqual(
+                db.execute_sql("SHOW application_name").fetchone()[0], name
+            )
+            self.assertIsNone(
+                db.execute_sql("SELECT to_regclass('pg_temp.pooled')")
+                .fetchone()[0]
+            )
+        self.assertEqual(db.pool_stats.hits, hits + 1)
+
+    def test_use_database_keeps_max_connections(self):
+        max_connections = db._max_connections
+        self.addCleanup(setattr, db, "_max_connections", max_connections)
+        db._max_connections = 7
+        database = db.database
+
+        use_database(use_database(f"{database}_other"))
+
+        self.assertEqual(db.database, database)
+        self.assertEqual(db._max_connections, 7)
@@ -95,21 +95,37 @@ class QuerySixTestCase(unittest.TestCase, SqlQueriesTestCaseMixin):
     --Query 6
     """
 
+    baseline = [
+        (Department, DEPARTMENTS),
+        (Course, COURSES),
+        (Instructor, INSTRUCTORS),
+        (Student, STUDENTS),
+        (CourseSection, COURSE_SECTIONS),
+        (Prerequisites, PREREQUISITES),
+    ]
+
+    # Limits on the query over generated data (see `PerformanceBudget`)
+    performance_budgets = [
+        PerformanceBudget(scale=0.1, max_ms=500, max_shared_buffers=20000),
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Connect to the database and create the shared fixtures."""
+        cls._load_baseline()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared fixtures and disconnect from the database."""
+        cls._unload_baseline()
+
     def setUp(self):
-        """Connect to the database."""
-        db.connect()
-        self._create_instances(Department, DEPARTMENTS)
-        self._create_instances(Course, COURSES)
-        self._create_instances(Instructor, INSTRUCTORS)
-        self._create_instances(Student, STUDENTS)
-        self._create_instances(CourseSection, COURSE_SECTIONS)
-        self._create_instances(Prerequisites, PREREQUISITES)
+        """Isolate the test from the others."""
+        self._begin_isolation()
 
     def tearDown(self):
-        """Disconnect to the database."""
-        self._drop_generated_table()
-        self._destroy_all_instances()
-        db.close()
+        """Undo everything the test did."""
+        self._end_isolation()
 
     def test_columns(self):
         self._execute_query()
@@ -123,6 +139,9 @@ class QuerySixTestCase(unittest.TestCase, SqlQueriesTestCaseMixin):
         self.assertEqual(results[3], "year")
         self.assertEqual(results[4], "semester")
 
+    def test_performance_budgets(self):
+        self._assert_performance_budgets()
+
     def test_students_that_take_all_prereqs(self):
         self._create_instances(
             StudentCourse,
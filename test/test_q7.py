@@ -87,20 +87,31 @@ class QuerySevenTestCase(unittest.TestCase, SqlQueriesTestCaseMixin):
     --Query 7
     """
 
+    baseline = [
+        (Department, DEPARTMENTS),
+        (Course, COURSES),
+        (Instructor, INSTRUCTORS),
+        (Student, STUDENTS),
+        (CourseSection, COURSE_SECTIONS),
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Connect to the database and create the shared fixtures."""
+        cls._load_baseline()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared fixtures and disconnect from the database."""
+        cls._unload_baseline()
+
     def setUp(self):
-        """Connect to the database."""
-        db.connect()
-        self._create_instances(Department, DEPARTMENTS)
-        self._create_instances(Course, COURSES)
-        self._create_instances(Instructor, INSTRUCTORS)
-        self._create_instances(Student, STUDENTS)
-        self._create_instances(CourseSection, COURSE_SECTIONS)
+        """Isolate the test from the others."""
+        self._begin_isolation()
 
     def tearDown(self):
-        """Disconnect to the database."""
-        self._drop_generated_table()
-        self._destroy_all_instances()
-        db.close()
+        """Undo everything the test did."""
+        self._end_isolation()
 
     def test_columns(self):
         self._execute_query()
@@ -0,0 +1,43 @@
+import unittest
+
+from test.utils.mixins import SqlQueriesTestCaseMixin
+
+
+class AssertRecordsEqualTestCase(unittest.TestCase, SqlQueriesTestCaseMixin):
+    record_diff_limit = 2
+
+    def test_multisets(self):
+        self._assert_records_equal(
+            iter([{"a": 2}, {"a": 1}, {"a": 1}]),
+            [{"a": 1}, {"a": 2}, {"a": 1}]
+        )
+        with self.assertRaises(AssertionError):
+            self._assert_records_equal([{"a": 1}], [{"a": 1}, {"a": 1}])
+        with self.assertRaises(AssertionError):
+            self._assert_records_equal([{"a": 1}, {"a": 1}], [{"a": 1}])
+
+    def test_tolerances(self):
+        self._assert_records_equal(
+            [{"avg": 80.3333333, "name": "Ann  Lee "}],
+            [{"avg": 80.33333, "name": "Ann Lee"}],
+            places=4, strip=True
+        )
+
+    def test_failure_message(self):
+        def actual():
+            yield {"a": 1}
+            for value in range(1000):
+                yield {"a": 100 + value % 5}
+
+        with self.assertRaises(AssertionError) as context:
+            self._assert_records_equal(actual(), [{"a": 1}, {"a": 2}])
+
+        self.assertEqual(str(context.exception), "\n".join([
+            "1001 records generated, 2 expected",
+            "Missing records:",
+            "  {'a': 2}",
+            "Unexpected records:",
+            "  {'a': 100} (x200)",
+            "  {'a': 101} (x200)",
+            "  ... and 600 more",
+        ]))
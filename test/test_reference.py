@@ -0,0 +1,74 @@
+import importlib
+
+from test.utils.reference import Registrar
+
+QUERY_TEST_CASES = {
+    1: "QueryOneTestCase",
+    2: "QueryTwoTestCase",
+    3: "QueryThreeTestCase",
+    4: "QueryFourTestCase",
+    5: "QueryFiveTestCase",
+    6: "QuerySixTestCase",
+    7: "QuerySevenTestCase",
+}
+
+
+class RegistrarStandIn:
+    """
+    Runs the tests of a query test case against `Registrar` instead of the
+    database, checking the reference engine against their expectations.
+    Tests that need the database itself are skipped.
+    """
+    number = None
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        self.registrar = Registrar(self.baseline)
+
+    def tearDown(self):
+        pass
+
+    def _create_instances(self, model, data, batch_size=None):
+        data = list(data)
+        self.registrar.add(model, data)
+        return data
+
+    def _execute_query(self):
+        pass
+
+    def _get_generated_table(self):
+        return self.registrar.query(self.number)
+
+    def _get_generated_table_columns(self):
+        self.skipTest("the columns come from the database")
+
+    def _assert_performance_budgets(self):
+        self.skipTest("the budgets are measured on the database")
+
+
+def _reference_test_case(number: int, name: str) -> type:
+    """
+    Returns the `RegistrarStandIn` variant of the test case `name` of query
+    `number`. Its module isn't imported here, not to run its tests twice.
+    """
+    case = getattr(importlib.import_module(f"test.test_q{number}"), name)
+    return type(
+        name.replace("Query", "Reference", 1),
+        (RegistrarStandIn, case),
+        {"number": number}
+    )
+
+
+globals().update(
+    (case.__name__, case) for case in (
+        _reference_test_case(number, name)
+        for number, name in QUERY_TEST_CASES.items()
+    )
+)
@@ -0,0 +1,82 @@
+import array
+import decimal
+import unittest
+
+from test.utils.results import ColumnarTable
+
+INT4 = 23
+NUMERIC = 1700
+BPCHAR = 1042
+
+
+class FakeConnection:
+    """
+    The type metadata `TypedConnection` caches, without a database.
+    """
+    type_oids = {"int4": INT4, "numeric": NUMERIC, "bpchar": BPCHAR}
+    type_decoders = {BPCHAR: str.rstrip}
+
+
+DESCRIPTION = [("sid", INT4), ("grade", NUMERIC), ("name", BPCHAR)]
+
+
+class ColumnarTableTestCase(unittest.TestCase):
+
+    def test_integer_columns_are_typed_arrays(self):
+        table = ColumnarTable.from_batches(
+            DESCRIPTION,
+            [[(1, decimal.Decimal("80.5"), "Ann  ")], [(2, None, "Bob  ")]],
+            FakeConnection()
+        )
+
+        self.assertIsInstance(table.column("sid"), array.array)
+        self.assertEqual(list(table.column("sid")), [1, 2])
+        self.assertEqual(
+            table.column("grade"), [decimal.Decimal("80.5"), None]
+        )
+        self.assertEqual(table.column("name"), ["Ann", "Bob"])
+
+    def test_null_in_integer_column(self):
+        table = ColumnarTable.from_batches(
+            DESCRIPTION[:1], [[(1,), (2,)], [(None,), (3,)]], FakeConnection()
+        )
+
+        self.assertEqual(table.column("sid"), [1, 2, None, 3])
+        self.assertEqual(len(table), 4)
+
+    def test_null_in_first_batch(self):
+        table = ColumnarTable.from_batches(
+            DESCRIPTION[:2],
+            [[(1, decimal.Decimal(1)), (None, decimal.Decimal(2))],
+             [(3, decimal.Decimal(3))]],
+            FakeConnection()
+        )
+
+        self.assertEqual(table.rows(), [
+            {"sid": 1, "grade": decimal.Decimal(1)},
+            {"sid": None, "grade": decimal.Decimal(2)},
+            {"sid": 3, "grade": decimal.Decimal(3)},
+        ])
+
+    def test_rows(self):
+        table = ColumnarTable.from_batches(
+            DESCRIPTION,
+            [[(1, decimal.Decimal(70), "Ann"),
+              (2, decimal.Decimal(90), "Bob")]],
+            FakeConnection()
+        )
+
+        self.assertEqual(dict(table.row(-1)), {
+            "sid": 2, "grade": decimal.Decimal(90), "name": "Bob"
+        })
+        self.assertEqual([row["name"] for row in table], ["Ann", "Bob"])
+        with self.assertRaises(IndexError):
+            table.row(2)
+
+    def test_empty(self):
+        table = ColumnarTable.from_batches(DESCRIPTION, [], FakeConnection())
+
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.rows(), [])
+        with self.assertRaises(IndexError):
+            table.row(-1)
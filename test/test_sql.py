@@ -0,0 +1,107 @@
+import unittest
+
+from test.utils.database import Department
+from test.utils.sql import (
+    find_select_body, normalise, quote, quoted_table_name, split_statements
+)
+
+
+class QuoteTestCase(unittest.TestCase):
+
+    def test_quote(self):
+        self.assertEqual(quote('a2_b"1'), '"a2_b""1"')
+
+    def test_quoted_table_name(self):
+        # Parallel workers point the models at their own copy of the schema
+        schema = Department._meta.schema
+        self.assertEqual(
+            quoted_table_name(Department), f'"{schema}"."department"'
+        )
+        self.assertEqual(
+            quoted_table_name(Department, "a2_b1"), '"a2_b1"."department"'
+        )
+
+
+class SplitStatementsTestCase(unittest.TestCase):
+
+    def test_split(self):
+        self.assertEqual(
+            split_statements("SET search_path TO A2;\nSELECT 1;  SELECT 2"),
+            ["SET search_path TO A2", "SELECT 1", "SELECT 2"]
+        )
+
+    def test_semicolons_in_strings_and_comments(self):
+        sql = """
+            SELECT 'a;b', "c;d" FROM t; -- e;f
+            /* g; h */ SELECT $$i;j$$, $tag$k;l$tag$;
+        """
+
+        self.assertEqual(split_statements(sql), [
+            "SELECT 'a;b', \"c;d\" FROM t",
+            "-- e;f\n            /* g; h */ SELECT $$i;j$$, $tag$k;l$tag$",
+        ])
+
+    def test_comment_only_statements_are_dropped(self):
+        self.assertEqual(
+            split_statements("--Query 1\n;\n/* nothing */;SELECT 1;"),
+            ["SELECT 1"]
+        )
+
+
+class FindSelectBodyTestCase(unittest.TestCase):
+
+    def test_create_table_as(self):
+        statements = [
+            "SET search_path TO A2",
+            "DROP TABLE IF EXISTS query1",
+            "CREATE TABLE query1 AS (SELECT dname FROM department)",
+        ]
+
+        self.assertEqual(
+            find_select_body(statements, "query1"),
+            (statements[:2], "(SELECT dname FROM department)")
+        )
+
+    def test_last_statement_filling_the_table(self):
+        statements = [
+            "CREATE VIEW query1 AS SELECT 1",
+            "CREATE OR REPLACE TEMP VIEW a2.\"query1\" (x) AS SELECT 2",
+            "CREATE TABLE query10 AS SELECT 3",
+        ]
+
+        self.assertEqual(
+            find_select_body(statements, "query1"),
+            (statements[:1], "SELECT 2")
+        )
+
+    def test_insert(self):
+        statements = [
+            "CREATE TABLE query2 (num INTEGER)",
+            "INSERT INTO query2 SELECT count(*) FROM student",
+            "INSERT INTO query2_extra SELECT 1",
+        ]
+
+        self.assertEqual(
+            find_select_body(statements, "query2"),
+            (statements[:1], "INSERT INTO query2 SELECT count(*) FROM student")
+        )
+
+    def test_not_filled_from_a_query(self):
+        self.assertIsNone(
+            find_select_body(["CREATE TABLE query1 (dname TEXT)"], "query1")
+        )
+
+
+class NormaliseTestCase(unittest.TestCase):
+
+    def test_layout_and_comments(self):
+        self.assertEqual(
+            normalise("SELECT  a,\n\tb -- columns\nFROM t /* table */;"),
+            normalise("SELECT a, b FROM t ;")
+        )
+
+    def test_strings_are_left_alone(self):
+        self.assertEqual(
+            normalise("SELECT 'a   b',\n  \"c  d\""),
+            "SELECT 'a   b', \"c  d\""
+        )
@@ -0,0 +1,54 @@
+import itertools
+import unittest
+
+from unittest import mock
+from test.utils.timing import PhaseTimings
+
+
+class Example(unittest.TestCase):
+
+    def test_example(self):
+        pass
+
+
+class PhaseTimingsTestCase(unittest.TestCase):
+
+    def test_class_method_counts_towards_current_test(self):
+        timings = PhaseTimings()
+        test = Example("test_example")
+        timings.current_test = test
+        timings.record(Example, "create_instances", 0.5)
+        timings.record(test, "execute_query", 0.25)
+
+        self.assertEqual(dict(timings.by_test[test.id()]), {
+            "create_instances": 0.5, "execute_query": 0.25
+        })
+        name = f"{Example.__module__}.Example"
+        self.assertEqual(timings.by_class[name]["create_instances"], [1, 0.5])
+
+    def test_outside_a_test_counts_towards_test_case_only(self):
+        timings = PhaseTimings()
+        timings.record(Example, "create_instances", 0.5)
+
+        self.assertEqual(dict(timings.by_test), {})
+        self.assertEqual(len(timings.by_class), 1)
+
+    def test_nested_phases_are_not_counted_twice(self):
+        timings = PhaseTimings()
+        test = Example("test_example")
+        timings.current_test = test
+        # Each reading of the clock is one second after the previous one
+        clock = itertools.count()
+        with mock.patch("time.perf_counter", lambda: next(clock)):
+            with timings.measure(test, "execute_query"):
+                with timings.measure(Example, "create_instances"):
+                    pass
+                with timings.measure(Example, "create_instances"):
+                    pass
+
+        # execute_query took 5 seconds, 2 of which creating instances
+        self.assertEqual(dict(timings.by_test[test.id()]), {
+            "execute_query": 3, "create_instances": 2
+        })
+        name = f"{Example.__module__}.Example"
+        self.assertEqual(timings.by_class[name]["create_instances"], [2, 2])
@@ -0,0 +1,80 @@
+import array
+import decimal
+import unittest
+import warnings
+
+from test.test_results import BPCHAR, NUMERIC, FakeConnection
+from test.utils import vectorised
+from test.utils.mixins import SqlQueriesTestCaseMixin
+from test.utils.results import ColumnarTable
+from test.utils.vectorised import numpy
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class VectorisedTestCase(unittest.TestCase):
+
+    def test_as_array(self):
+        integers = vectorised.as_array(array.array("q", [3, 1, 2]))
+        self.assertEqual(integers.dtype, numpy.int64)
+        numeric = vectorised.as_array(
+            [decimal.Decimal("1.5"), None], numeric=True
+        )
+        self.assertEqual(numeric[0], 1.5)
+        self.assertTrue(numpy.isnan(numeric[1]))
+
+    def test_sort_values_puts_nulls_last(self):
+        self.assertEqual(
+            vectorised.sort_values(
+                vectorised.as_array(["b", None, "a", None])
+            ).tolist(),
+            ["a", "b", None, None]
+        )
+        self.assertEqual(
+            vectorised.sort_values(vectorised.as_array([3, None, 1])).tolist(),
+            [1, 3, None]
+        )
+
+    def test_group_extrema(self):
+        self.assertEqual(
+            vectorised.group_extrema(
+                ["CSC", "MAT", "CSC"],
+                [decimal.Decimal(70), 50, decimal.Decimal("90.5")]
+            ),
+            {"CSC": (70.0, 90.5), "MAT": (50.0, 50.0)}
+        )
+
+    def test_group_extrema_ignores_null_values(self):
+        self.assertEqual(
+            vectorised.group_extrema(
+                ["CSC", "CSC", "MAT"], [decimal.Decimal(70), None, None]
+            ),
+            {"CSC": (70.0, 70.0), "MAT": (None, None)}
+        )
+
+    def test_group_extrema_null_keys(self):
+        self.assertEqual(
+            vectorised.group_extrema(["CSC", None, "CSC", None], [1, 2, 3, 4]),
+            {"CSC": (1.0, 3.0), None: (2.0, 4.0)}
+        )
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class GroupExtremaTestCase(unittest.TestCase, SqlQueriesTestCaseMixin):
+
+    def test_nulls_as_in_sql(self):
+        table = ColumnarTable.from_batches(
+            [("dcode", BPCHAR), ("grade", NUMERIC)],
+            [[("CSC", decimal.Decimal(80)), ("CSC", None),
+              (None, decimal.Decimal(60)), ("MAT", None)]],
+            FakeConnection()
+        )
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self._assert_group_extrema(table, "dcode", "grade", {
+                "CSC": (80, 80), None: (60, 60), "MAT": (None, None)
+            })
+            with self.assertRaises(AssertionError):
+                self._assert_group_extrema(table, "dcode", "grade", {
+                    "CSC": (80, 80), None: (60, 60), "MAT": (0, 0)
+                })
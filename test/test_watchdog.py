@@ -0,0 +1,74 @@
+import time
+import unittest
+from test.utils.mixins import *
+from test.utils.generic_data import DEPARTMENTS
+from test.utils.watchdog import QueryWatchdog
+
+
+class SlowQuery(SqlQueriesTestCaseMixin):
+    """
+    A test case of a query that sleeps for longer than its `query_timeout`,
+    with or without the departments as a baseline.
+    """
+    table = "slow_query"
+    query = """
+    SET search_path TO A2;
+    CREATE TABLE slow_query AS SELECT 1 AS slept FROM pg_sleep(5);
+    """
+    query_timeout = 200
+    statement_timeout = None
+
+    @classmethod
+    def setUpClass(cls):
+        if cls.baseline:
+            cls._load_baseline()
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.baseline:
+            cls._unload_baseline()
+
+    def setUp(self):
+        if not self.baseline:
+            db.connect()
+        self._begin_isolation()
+
+    def tearDown(self):
+        self._end_isolation()
+        if not self.baseline:
+            db.close()
+
+    def test_query(self):
+        self._execute_query()
+
+
+class QueryWatchdogTestCase(unittest.TestCase):
+
+    def test_cancellation_reported_as_failure(self):
+        for baseline in (True, False):
+            with self.subTest(baseline=baseline):
+                class Case(SlowQuery, unittest.TestCase):
+                    pass
+                Case.baseline = [(Department, DEPARTMENTS)] if baseline else []
+                result = unittest.TestResult()
+                start = time.perf_counter()
+                unittest.defaultTestLoader.loadTestsFromTestCase(Case) \
+                    .run(result)
+
+                self.assertLess(time.perf_counter() - start, 4)
+                self.assertEqual(result.errors, [])
+                self.assertEqual(len(result.failures), 1)
+                message = result.failures[0][1]
+                self.assertIn("Performance failure", message)
+                self.assertIn("over its query_timeout of 200ms", message)
+
+    def test_finished_block_not_cancelled(self):
+        with db.connection_context():
+            pid = db.connection().get_backend_pid()
+            with QueryWatchdog(pid, 0.05) as watchdog:
+                db.execute_sql("SELECT 1")
+            time.sleep(0.1)
+            self.assertEqual(db.execute_sql("SELECT 2").fetchone()[0], 2)
+
+        self.assertFalse(watchdog.cancelled)
+        self.assertLess(watchdog.elapsed, 0.05)
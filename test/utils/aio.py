@@ -0,0 +1,152 @@
+import asyncio
+import concurrent.futures
+import os
+import queue
+
+from typing import Any, Dict, Iterable, List, Tuple
+from test.utils.database import *
+from test.utils.ingest import copy_instances
+from test.utils.mixins import SqlQueriesTestCaseMixin
+from test.utils.snapshots import create_schema_copies, drop_schemas
+
+# Connections (one per thread) that the database work of the async methods
+# is spread over
+ASYNC_CONNECTIONS = 4
+
+# Name of the copy of the schema the models use that the i-th concurrent
+# scenario of `_run_scenarios()` runs in. The process id keeps concurrent
+# runs from replacing each other's copies
+SCENARIO_SCHEMA = "{schema}_s{index}_{pid}"
+
+# `MODELS` grouped so that each group only references the tables of the
+# groups before it. The tables of a group are loaded concurrently
+MODEL_GROUPS = [
+    [Department],
+    [Student, Instructor, Course],
+    [CourseSection, Prerequisites],
+    [StudentCourse],
+]
+
+Fixtures = List[Tuple[Any, Iterable[Dict[str, Any]]]]
+
+
+class AsyncSqlQueriesTestCaseMixin(SqlQueriesTestCaseMixin):
+    """
+    An asyncio variant of `SqlQueriesTestCaseMixin`, for test cases based on
+    `unittest.IsolatedAsyncioTestCase`. psycopg2 blocks, so the database
+    work runs on a pool of `async_connections` threads, each with its own
+    connection from `db`, and the coroutines await it.
+    """
+    async_connections = ASYNC_CONNECTIONS
+    _executor = None
+
+    @classmethod
+    def _get_executor(cls) -> concurrent.futures.ThreadPoolExecutor:
+        if cls._executor is None:
+            cls._executor = concurrent.futures.ThreadPoolExecutor(
+                cls.async_connections, thread_name_prefix="sql"
+            )
+        return cls._executor
+
+    @classmethod
+    def _shutdown_executor(cls):
+        """
+        Call from `tearDownClass`. Stops the threads of the test case.
+        """
+        if cls._executor is not None:
+            cls._executor.shutdown()
+            cls._executor = None
+
+    async def _run_in_thread(self, function, *args):
+        """
+        Runs `function(*args)` on one of the threads, and returns its result.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), function, *args
+        )
+
+    async def _run_in_connection(self, function, *args):
+        """
+        Runs `function(*args)` on one of the threads, connected to the
+        database for the duration of the call, and returns its result.
+        """
+        def run():
+            with db.connection_context():
+                return function(*args)
+        return await self._run_in_thread(run)
+
+    async def _create_instances_concurrently(self, fixtures: Fixtures):
+        """
+        Creates the (model, data) pairs of `fixtures`, loading the tables of
+        each group of `MODEL_GROUPS` (e.g. `Student`, `Instructor` and
+        `Course`) at the same time over separate connections. Each table is
+        committed as it is loaded, so this is only for test cases cleaned up
+        by `_destroy_all_instances()`: inside a transaction (a baseline, or
+        `transactional` set) the other connections could not see its rows,
+        and the fixtures are created one after the other on its connection.
+        """
+        if db.in_transaction():
+            for model, data in fixtures:
+                self._create_instances(model, data)
+            return
+        for group in MODEL_GROUPS:
+            await asyncio.gather(*(
+                self._run_in_connection(self._create_instances, model, data)
+                for model, data in fixtures if model in group
+            ))
+
+    def _run_scenario(
+            self,
+            schemas: queue.Queue,
+            fixtures: Fixtures
+    ) -> List[Dict[str, Any]]:
+        """
+        Runs the query over `fixtures` in a schema claimed from `schemas`,
+        inside a transaction that is rolled back, and returns the rows of
+        the generated table.
+        """
+        schema = schemas.get()
+        try:
+            with db.atomic() as transaction:
+                db.execute_sql(f"SET LOCAL search_path TO {schema}")
+                for model, data in fixtures:
+                    copy_instances(model, data, schema=schema)
+                with self._guard_query():
+                    db.execute_sql(self._get_query(schema))
+                cursor = db.execute_sql(f"SELECT * FROM {schema}.{self.table}")
+                rows = list(
+                    self._decode_rows(cursor.description, cursor.fetchall())
+                )
+                transaction.rollback()
+            return rows
+        finally:
+            schemas.put(schema)
+
+    async def _run_scenarios(
+            self,
+            scenarios: List[Fixtures]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Runs the query once over the fixtures of each of `scenarios`, up to
+        `async_connections` at a time, each over its own connection and in
+        its own copy of the schema. Returns the rows the query generated in
+        each scenario, in order. The fixtures and tables of the test itself
+        are left untouched.
+        """
+        workers = max(1, min(self.async_connections, len(scenarios)))
+        schema = BaseModel._meta.schema
+        names = [
+            SCENARIO_SCHEMA.format(schema=schema, index=index, pid=os.getpid())
+            for index in range(workers)
+        ]
+        await self._run_in_thread(create_schema_copies, names, schema)
+        try:
+            schemas = queue.Queue()
+            for name in names:
+                schemas.put(name)
+            return await asyncio.gather(*(
+                self._run_in_connection(self._run_scenario, schemas, fixtures)
+                for fixtures in scenarios
+            ))
+        finally:
+            await self._run_in_thread(drop_schemas, names)
@@ -0,0 +1,195 @@
+import argparse
+import json
+import logging
+import math
+import statistics
+import time
+
+from typing import Any, Dict, List, Optional
+from test.utils.database import *
+from test.utils.discovery import collect_test_cases
+from test.utils.synthetic import load_generated_data
+
+# Scale factors of `RegistrarGenerator` the queries are run at by default
+SCALES = (0.1, 0.3, 1.0)
+
+# Growth exponent (time ~ scale ** exponent between the smallest and the
+# largest scale) above which a query is flagged as scaling badly
+SUPERLINEAR_EXPONENT = 1.5
+
+
+def _measure(case, repeats: int) -> Dict[str, Any]:
+    """
+    Runs the query of `case` `repeats` times against the loaded data, each
+    time in a savepoint that is rolled back, and returns its planner cost,
+    the rows it produced and its wall times (in milliseconds).
+    """
+    measurement = {"cost": None, "rows": None, "times_ms": [], "error": None}
+    try:
+        with db.savepoint() as savepoint:
+            plan = case._explain_query()
+            measurement["cost"] = plan["Plan"]["Total Cost"]
+            savepoint.rollback()
+        for _ in range(repeats):
+            with db.savepoint() as savepoint:
+                start = time.perf_counter()
+                case._execute_query()
+                measurement["times_ms"].append(
+                    1000 * (time.perf_counter() - start)
+                )
+                measurement["rows"] = db.execute_sql(
+                    f"SELECT count(*) FROM "
+                    f"{BaseModel._meta.schema}.{case.table}"
+                ).fetchone()[0]
+                savepoint.rollback()
+    except Exception as error:
+        measurement["error"] = f"{type(error).__name__}: {error}"
+    return measurement
+
+
+def run(
+        scales=SCALES,
+        repeats: int = 3,
+        seed: int = 0,
+        queries: Optional[List[int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Benchmarks the query of each `QueryNTestCase` (or only those numbered
+    in `queries`) against the data `RegistrarGenerator` generates with
+    `seed` at each of `scales`. The data of a scale is loaded (and
+    analysed) once for all the queries, and rolled back afterwards. Returns
+    one result per query and scale.
+    """
+    cases = collect_test_cases()
+    if queries:
+        cases = {number: cases[number] for number in queries}
+
+    results = []
+    with db.connection_context():
+        for scale in scales:
+            with db.transaction() as transaction:
+                rows = load_generated_data(scale, seed)
+                logging.info(f"Loaded scale {scale}: {rows}")
+
+                for number, case in cases.items():
+                    measurement = _measure(case, repeats)
+                    times = measurement["times_ms"]
+                    results.append({
+                        "query": number,
+                        "scale": scale,
+                        "enrollments": rows[StudentCourse.__name__],
+                        "rows": measurement["rows"],
+                        "cost": measurement["cost"],
+                        "times_ms": times,
+                        "min_ms": min(times) if times else None,
+                        "mean_ms": statistics.mean(times) if times else None,
+                        "error": measurement["error"],
+                    })
+                transaction.rollback(begin=False)
+    return results
+
+
+def growth_exponent(results: List[Dict[str, Any]]) -> Optional[float]:
+    """
+    Returns k such that the fastest time of a query grows like scale ** k
+    between the smallest and the largest of its `results`, or None if it
+    cannot be estimated.
+    """
+    timed = sorted(
+        (result["scale"], result["min_ms"]) for result in results
+        if result["min_ms"]
+    )
+    if len(timed) < 2 or timed[0][0] == timed[-1][0]:
+        return None
+    (low_scale, low_time), (high_scale, high_time) = timed[0], timed[-1]
+    return math.log(high_time / low_time) / math.log(high_scale / low_scale)
+
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    """
+    Returns `results` as a text table: the fastest time, rows and planner
+    cost of each query at each scale, and how its time grows with scale.
+    """
+    scales = sorted({result["scale"] for result in results})
+    queries = sorted({result["query"] for result in results})
+    by_key = {(result["query"], result["scale"]): result for result in results}
+
+    header = ["query"] + [f"scale {scale:g}" for scale in scales] + ["growth"]
+    lines = []
+    for number in queries:
+        cells = [f"query{number}"]
+        for scale in scales:
+            result = by_key[(number, scale)]
+            if result["error"]:
+                cells.append("error")
+            else:
+                cells.append(
+                    f"{result['min_ms']:.1f}ms {result['rows']} rows "
+                    f"cost {result['cost']:.0f}"
+                )
+        exponent = growth_exponent(
+            [by_key[(number, scale)] for scale in scales]
+        )
+        if exponent is None:
+            cells.append("-")
+        else:
+            flag = " !" if exponent > SUPERLINEAR_EXPONENT else ""
+            cells.append(f"n^{exponent:.2f}{flag}")
+        lines.append(cells)
+
+    widths = [
+        max(len(row[column]) for row in [header] + lines)
+        for column in range(len(header))
+    ]
+    table = [
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths))
+        for row in [header] + lines
+    ]
+    table.insert(1, "  ".join("-" * width for width in widths))
+    errors = [
+        f"query{result['query']} at scale {result['scale']:g}: "
+        f"{result['error']}"
+        for result in results if result["error"]
+    ]
+    return "\n".join(table + ([""] + errors if errors else []))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the queries against generated data at "
+                    "several scale factors."
+    )
+    parser.add_argument(
+        "queries", nargs="*", type=int,
+        help="numbers of the queries to benchmark (default: all)"
+    )
+    parser.add_argument(
+        "-s", "--scales", nargs="+", type=float, default=list(SCALES),
+        help="scale factors of the generated data "
+             f"(default: {' '.join(map(str, SCALES))})"
+    )
+    parser.add_argument(
+        "-n", "--repeats", type=int, default=3,
+        help="number of runs of each query per scale (default: 3)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0,
+        help="seed of the generated data (default: 0)"
+    )
+    parser.add_argument(
+        "--json", metavar="PATH",
+        help="also write the results as JSON to PATH"
+    )
+    arguments = parser.parse_args()
+
+    results = run(
+        arguments.scales, arguments.repeats, arguments.seed, arguments.queries
+    )
+    print(format_report(results))
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+
+from typing import Any, Dict, NamedTuple, Optional
+
+# Check performance budgets. They load generated data and depend on the
+# machine, so they are skipped unless the CHECK_BUDGETS environment
+# variable is set to 1
+CHECK_BUDGETS = os.environ.get("CHECK_BUDGETS") == "1"
+
+
+class PerformanceBudget(NamedTuple):
+    """
+    Limits on the query of a test case, over the data `RegistrarGenerator`
+    generates at `scale` (see `_assert_performance_budgets()`):
+    - max_ms is the time its fastest run may take, in milliseconds.
+    - max_shared_buffers is the number of shared buffers (hit or read) it
+      may touch under EXPLAIN (ANALYZE, BUFFERS).
+    None means no limit.
+    """
+    scale: float
+    max_ms: Optional[float] = None
+    max_shared_buffers: Optional[int] = None
+
+
+def shared_buffers(plan: Dict[str, Any]) -> int:
+    """
+    Returns the shared buffers hit or read by the whole of `plan`, as
+    returned by `EXPLAIN (FORMAT JSON, ANALYZE, BUFFERS)`.
+    """
+    node = plan["Plan"]
+    return node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0)
@@ -0,0 +1,170 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from test.utils.database import *
+from test.utils.snapshots import get_schema_ddl
+from test.utils.sql import normalise
+
+# Directory the generated tables are cached in (at the project root)
+CACHE_DIRECTORY = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", ".result_cache"
+))
+
+# Maximum number of generated tables cached; the least recently used are
+# evicted first
+CACHE_MAX_ENTRIES = 1000
+
+_schema_ddl: Dict[Tuple[str, str], List[str]] = {}
+
+
+def schema_ddl(schema: str) -> List[str]:
+    """
+    Returns the DDL of `schema` (see `get_schema_ddl()`), written as if it
+    were the `a2` schema so that worker schemas share cache entries. Read
+    from the catalog once per database and schema.
+    """
+    key = (db.database, schema)
+    if key not in _schema_ddl:
+        _schema_ddl[key] = get_schema_ddl(db, schema, "a2")
+    return _schema_ddl[key]
+
+
+def fingerprint(
+        query: str,
+        fixtures: Iterable[Tuple[Any, Iterable[Dict[str, Any]]]],
+        ddl: List[str]
+) -> str:
+    """
+    Returns the cache key of the table `query` generates from `fixtures`
+    ((model, data) pairs, in the order they are created) in a schema
+    defined by `ddl`. Changes to the layout or comments of the query do not
+    change the key.
+    """
+    content = json.dumps(
+        {
+            "query": normalise(query),
+            "fixtures": [
+                [model._meta.table_name, list(data)]
+                for model, data in fixtures
+            ],
+            "ddl": ddl,
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Generated tables stored on disk, one pickle per key, in `directory`.
+    The modification time of an entry is its last use: once there are
+    more than `max_entries`, the least recently used are evicted.
+    """
+
+    def __init__(
+            self,
+            directory: str = CACHE_DIRECTORY,
+            max_entries: int = CACHE_MAX_ENTRIES
+    ):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def _entries(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".pickle")
+        ]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the entry stored under `key` (a dictionary with the
+        "columns" and "rows" of the table), or None.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                entry = pickle.load(file)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return entry
+
+    def put(self, key: str, columns: List[str], rows: List[Dict[str, Any]]):
+        """
+        Stores the `columns` and `rows` of a generated table under `key`,
+        then evicts the least recently used entries over `max_entries`.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(descriptor, "wb") as file:
+            pickle.dump({"columns": columns, "rows": rows}, file)
+        os.replace(temporary, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries over `max_entries`.
+        """
+        entries = self._entries()
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """
+        Removes the entry stored under `key`, or every entry if no key is
+        given. Returns the number of entries removed.
+        """
+        paths = [self._path(key)] if key else self._entries()
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def __len__(self):
+        return len(self._entries())
+
+
+result_cache = ResultCache()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Inspect or clear the cache of generated tables."
+    )
+    parser.add_argument(
+        "--clear", action="store_true", help="remove every cached table"
+    )
+    arguments = parser.parse_args()
+    if arguments.clear:
+        print(f"Removed {result_cache.invalidate()} cached tables")
+    else:
+        print(
+            f"{len(result_cache)} cached tables in {result_cache.directory} "
+            f"(at most {result_cache.max_entries})"
+        )
+
+
+if __name__ == "__main__":
+    main()
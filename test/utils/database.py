@@ -1,6 +1,144 @@
+import atexit
+import logging
+import time
 import peewee
+import psycopg2
+import psycopg2.extensions
 
-db = peewee.PostgresqlDatabase(
+from playhouse import pool
+
+# Keep connections open between test cases (resetting their session state)
+# instead of opening a new connection for each of them
+POOL_CONNECTIONS = True
+
+
+class PoolStats:
+    """
+    Counts the connections handed out by a `PooledPostgresqlDatabase`.
+    - hits are warm connections taken from the pool.
+    - misses are new connections, which took `connect_time` seconds in total.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.connect_time = 0.0
+
+    @property
+    def time_saved(self) -> float:
+        """
+        Estimated seconds saved by the hits, at the average connect time.
+        """
+        if not self.misses:
+            return 0.0
+        return self.hits * self.connect_time / self.misses
+
+    def __str__(self):
+        return (
+            f"{self.hits} pool hits, {self.misses} new connections "
+            f"({self.connect_time * 1000:.1f}ms), "
+            f"~{self.time_saved * 1000:.1f}ms of connecting saved"
+        )
+
+
+class TypedConnection(psycopg2.extensions.connection):
+    """
+    A psycopg2 connection that remembers the OIDs of the types in
+    `TYPE_DECODERS` (`type_oids`) and the decoders of result values by type
+    OID (`type_decoders`), as loaded by `PostgresqlDatabase`, and whether a
+    `PooledPostgresqlDatabase` already handed it out (`handed_out`).
+    """
+    type_oids = None
+    type_decoders = None
+    handed_out = False
+
+
+# Decoders applied to result values by type name (None keeps them as is)
+TYPE_DECODERS = {
+    # CHAR(n) values come back padded with spaces
+    "bpchar": str.rstrip,
+    # psycopg2 already returns these as `Decimal` and `str`
+    "numeric": None,
+    "varchar": None,
+    # Looked up so integer columns can be stored in typed arrays
+    "int2": None,
+    "int4": None,
+    "int8": None,
+}
+
+
+class PostgresqlDatabase(peewee.PostgresqlDatabase):
+    """
+    Loads the type metadata of each new connection once, when connecting,
+    so decoding results needs no catalog round trips.
+    """
+
+    def __init__(self, database, **kwargs):
+        kwargs.setdefault("connection_factory", TypedConnection)
+        super().__init__(database, **kwargs)
+
+    def _initialize_connection(self, conn):
+        if conn.type_oids is not None:
+            return
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                    SELECT typname, oid FROM pg_type
+                    WHERE typnamespace = 'pg_catalog'::regnamespace
+                        AND typname = ANY(%s)
+                """,
+                (list(TYPE_DECODERS),)
+            )
+            conn.type_oids = dict(cursor.fetchall())
+        conn.rollback()
+        conn.type_decoders = {
+            conn.type_oids[name]: decoder
+            for name, decoder in TYPE_DECODERS.items()
+            if decoder is not None and name in conn.type_oids
+        }
+
+
+class PooledPostgresqlDatabase(
+        pool._PooledPostgresqlDatabase,
+        PostgresqlDatabase
+):
+    """
+    A connection pool that resets the session state (search_path, temporary
+    tables, prepared statements, ...) of each connection returned to it, and
+    keeps `PoolStats` in `pool_stats`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.pool_stats = PoolStats()
+        super().__init__(*args, **kwargs)
+
+    def _connect(self):
+        start = time.perf_counter()
+        conn = super()._connect()
+        # Tagged rather than tracked by id(), which closed connections free
+        if conn.handed_out:
+            self.pool_stats.hits += 1
+        else:
+            conn.handed_out = True
+            self.pool_stats.misses += 1
+            self.pool_stats.connect_time += time.perf_counter() - start
+        return conn
+
+    def _can_reuse(self, conn):
+        if not super()._can_reuse(conn):
+            return False
+        try:
+            # DISCARD ALL cannot run inside the transaction psycopg2 opens
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute("DISCARD ALL")
+            conn.autocommit = False
+        except psycopg2.Error:
+            return False
+        return True
+
+
+db = (PooledPostgresqlDatabase if POOL_CONNECTIONS else PostgresqlDatabase)(
     "postgres",
     user="postgres",
     password="Password@123",
@@ -10,6 +148,12 @@ db = peewee.PostgresqlDatabase(
 )
 
 
+@atexit.register
+def _log_pool_stats():
+    if POOL_CONNECTIONS and db.pool_stats.misses:
+        logging.info(db.pool_stats)
+
+
 class BaseModel(peewee.Model):
     class Meta:
         database = db
@@ -158,3 +302,24 @@ class Prerequisites(BaseModel):
             peewee.SQL('FOREIGN KEY (cid, dcode) REFERENCES a2.course(cid, dcode)'),
             peewee.SQL('FOREIGN KEY (pcid, pdcode) REFERENCES a2.course(cid, dcode)')
         ]
+
+
+# Every table of the schema, ordered so that referenced tables come first
+MODELS = [
+    Department,
+    Student,
+    Instructor,
+    Course,
+    CourseSection,
+    StudentCourse,
+    Prerequisites,
+]
+
+
+def use_schema(schema: str):
+    """
+    Points every model, and the search_path set by the test cases, at
+    `schema` instead of `a2` (e.g. a per-worker copy of it).
+    """
+    for model in [BaseModel] + MODELS:
+        model._meta.schema = schema
@@ -0,0 +1,228 @@
+import argparse
+import collections
+import random
+import sys
+import time
+
+from typing import Any, Dict, List, Optional, Tuple
+from test.utils.database import *
+from test.utils.discovery import collect_test_cases
+from test.utils.enums import Semester
+from test.utils.ingest import copy_instances
+from test.utils.reference import CURRENT_YEAR, Registrar
+from test.utils.synthetic import DEPARTMENT_NAMES
+
+# Decimal places averages are compared to (PostgreSQL and `Decimal` round
+# repeating decimals differently)
+DIFF_PLACES = 6
+
+# Departments of the random fixtures, named as in `DEPARTMENT_NAMES` since
+# queries may filter on the names
+DEPARTMENT_CODES = ["CSC", "MGM", "AST", "MAT", "PHY", "BIO"]
+DEGREES = ["PhD", "MsC", "BsC"]
+NAMES = ["Smith", "Tang", "Zhang", "Li", "Babu", "Lee", "Kelly", "Jason"]
+SECTIONS = ["LEC01", "LEC02", "LEC03"]
+YEARS = range(2014, CURRENT_YEAR + 1)
+
+SEPARATOR = "-" * 70
+DOUBLE_SEPARATOR = "=" * 70
+
+
+def random_fixtures(
+        rng: random.Random,
+        size: int
+) -> List[Tuple[Any, List[Dict[str, Any]]]]:
+    """
+    Returns random fixtures, as (model, data) pairs in `MODELS` order, for
+    `size` students. The other tables grow with `size`, and values are
+    drawn from small domains so that the ties and edge cases the queries
+    must handle (PhDs, the current term, missing prerequisites, ...) come
+    up often.
+    """
+    codes = ["CSC"] + rng.sample(DEPARTMENT_CODES[1:], rng.randint(1, 3))
+    departments = [
+        {"dcode": code, "dname": DEPARTMENT_NAMES[code]} for code in codes
+    ]
+    instructors = [
+        {
+            "iid": iid,
+            "ilastname": rng.choice(NAMES),
+            "ifirstname": rng.choice(NAMES),
+            "idegree": rng.choice(DEGREES),
+            "dcode": rng.choice(codes),
+        }
+        for iid in range(1, size // 4 + 3)
+    ]
+    students = [
+        {
+            "sid": sid,
+            "slastname": rng.choice(NAMES),
+            "sfirstname": rng.choice(NAMES),
+            "sex": rng.choice("MF"),
+            "age": rng.randint(17, 30),
+            "dcode": rng.choice(codes),
+            "yearofstudy": rng.randint(1, 4),
+        }
+        for sid in range(1, size + 1)
+    ]
+    courses = [
+        {"cid": cid, "dcode": rng.choice(codes), "cname": f"Course {cid}"}
+        for cid in range(1, size // 3 + 4)
+    ]
+    prerequisites = {
+        (course["cid"], course["dcode"], earlier["cid"], earlier["dcode"])
+        for index, course in enumerate(courses)
+        for earlier in rng.sample(
+            courses[:index], min(index, rng.randint(0, 2))
+        )
+    }
+    sections = {}
+    for course in courses:
+        for _ in range(rng.randint(0, 3)):
+            key = (
+                course["cid"], course["dcode"], rng.choice(YEARS),
+                rng.choice(list(Semester)).value, rng.choice(SECTIONS)
+            )
+            sections.setdefault(key, len(sections) + 1)
+    enrollments = {
+        (rng.randint(1, size), csid): rng.randint(0, 20) * 5
+        for csid in sections.values()
+        for _ in range(rng.randint(0, 6))
+    } if size else {}
+
+    return [
+        (Department, departments),
+        (Student, students),
+        (Instructor, instructors),
+        (Course, courses),
+        (CourseSection, [
+            {
+                "csid": csid, "cid": cid, "dcode": dcode, "year": year,
+                "semester": semester, "section": section,
+                "iid": rng.choice(instructors)["iid"],
+            }
+            for (cid, dcode, year, semester, section), csid in sections.items()
+        ]),
+        (StudentCourse, [
+            {"sid": sid, "csid": csid, "grade": grade}
+            for (sid, csid), grade in enrollments.items()
+        ]),
+        (Prerequisites, [
+            {"cid": cid, "dcode": dcode, "pcid": pcid, "pdcode": pdcode}
+            for cid, dcode, pcid, pdcode in sorted(prerequisites)
+        ]),
+    ]
+
+
+def _check_query(case, expected) -> Optional[str]:
+    """
+    Runs the query of `case` against the loaded fixtures and returns why
+    its table differs from `expected` (or errored), or None if it matches.
+    Everything the query did is rolled back.
+    """
+    with db.savepoint() as savepoint:
+        try:
+            case._execute_query()
+            case._assert_records_equal(
+                case._iter_generated_table(), expected, places=DIFF_PLACES
+            )
+        except AssertionError as error:
+            return str(error)
+        except Exception as error:
+            return f"{type(error).__name__}: {error}"
+        finally:
+            savepoint.rollback()
+    return None
+
+
+def run(
+        scenarios: int = 100,
+        size: int = 20,
+        seed: int = 0,
+        queries: Optional[List[int]] = None,
+        stream=sys.stderr
+) -> bool:
+    """
+    Checks the query of each `QueryNTestCase` (or only those numbered in
+    `queries`) against `Registrar` over `scenarios` random fixture sets of
+    `size` students, seeded `seed`, `seed + 1`, ... Each fixture set is
+    loaded once for all the queries and rolled back afterwards. Writes the
+    differences found and the time spent per query to `stream`, and
+    returns whether every query matched in every scenario.
+    """
+    cases = collect_test_cases()
+    if queries:
+        cases = {number: cases[number] for number in queries}
+    failures = collections.defaultdict(list)
+    timings = collections.defaultdict(list)
+
+    start = time.perf_counter()
+    with db.connection_context():
+        for scenario_seed in range(seed, seed + scenarios):
+            fixtures = random_fixtures(random.Random(scenario_seed), size)
+            registrar = Registrar(fixtures)
+            with db.transaction() as transaction:
+                for model, data in fixtures:
+                    copy_instances(model, data)
+                for number, case in cases.items():
+                    query_start = time.perf_counter()
+                    failure = _check_query(case, registrar.query(number))
+                    timings[number].append(time.perf_counter() - query_start)
+                    if failure is not None:
+                        failures[number].append((scenario_seed, failure))
+                transaction.rollback(begin=False)
+    elapsed = time.perf_counter() - start
+    successful = not failures
+
+    for number, case in cases.items():
+        for scenario_seed, failure in failures[number][:1]:
+            stream.write(
+                f"{DOUBLE_SEPARATOR}\nFAIL: query{number} "
+                f"({type(case).__name__}), seed {scenario_seed}\n"
+                f"{SEPARATOR}\n{failure}\n"
+            )
+    stream.write(
+        f"{SEPARATOR}\nChecked {len(cases)} queries over {scenarios} "
+        f"scenarios of {size} students in {elapsed:.3f}s\n\n"
+    )
+    for number in cases:
+        times = timings[number]
+        stream.write(
+            f"query{number}: {len(failures[number])}/{scenarios} failed, "
+            f"mean {1000 * sum(times) / len(times):.1f}ms, "
+            f"max {1000 * max(times):.1f}ms\n"
+        )
+
+    stream.write("\nOK\n" if successful else "\nFAILED\n")
+    return successful
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check the queries against a reference implementation "
+                    "over random fixtures."
+    )
+    parser.add_argument(
+        "queries", nargs="*", type=int,
+        help="numbers of the queries to check (default: all)"
+    )
+    parser.add_argument(
+        "-n", "--scenarios", type=int, default=100,
+        help="number of random fixture sets (default: 100)"
+    )
+    parser.add_argument(
+        "-s", "--size", type=int, default=20,
+        help="number of students per fixture set (default: 20)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0,
+        help="seed of the first fixture set (default: 0)"
+    )
+    arguments = parser.parse_args()
+    sys.exit(0 if run(
+        arguments.scenarios, arguments.size, arguments.seed, arguments.queries
+    ) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import importlib
+import unittest
+
+from typing import Dict, Iterator, List, Optional
+from test.utils.mixins import SqlQueriesTestCaseMixin
+
+# Modules holding the `QueryNTestCase`s of the queries
+TEST_MODULES = [f"test.test_q{number}" for number in range(1, 8)]
+
+
+def load_suite(names: Optional[List[str]] = None) -> unittest.TestSuite:
+    """
+    Returns the suite of the tests under `test/`, or of the test modules,
+    classes or methods named by `names`.
+    """
+    loader = unittest.defaultTestLoader
+    if names:
+        return loader.loadTestsFromNames(names)
+    return loader.discover("test", top_level_dir=".")
+
+
+def iter_tests(suite) -> Iterator[unittest.TestCase]:
+    """
+    Yields the tests of `suite`, flattening the suites nested in it.
+    """
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from iter_tests(test)
+        else:
+            yield test
+
+
+def collect_test_cases() -> Dict[int, SqlQueriesTestCaseMixin]:
+    """
+    Returns an instance of each `QueryNTestCase` of `TEST_MODULES`, by N.
+    """
+    cases = {}
+    for name in TEST_MODULES:
+        module = importlib.import_module(name)
+        for value in vars(module).values():
+            if isinstance(value, type) \
+                    and issubclass(value, SqlQueriesTestCaseMixin) \
+                    and value.__module__ == name and value.table:
+                cases[int(value.table[len("query"):])] = value()
+    return dict(sorted(cases.items()))
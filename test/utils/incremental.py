@@ -0,0 +1,183 @@
+import argparse
+import glob
+import hashlib
+import inspect
+import json
+import os
+import re
+import sys
+import unittest
+
+from typing import Dict, List, Optional
+from test.utils.discovery import iter_tests, load_suite
+from test.utils.sql import normalise
+
+# File the fingerprint and last outcome of each test case are kept in
+STATE_FILE = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", ".test_state.json"
+))
+
+UTILS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def _class_name(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _utils_fingerprint() -> str:
+    """
+    Returns a hash of the source of `test/utils`, which every test case
+    depends on (models, fixtures, mixin, ...).
+    """
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(UTILS_DIRECTORY, "*.py"))):
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def _source(cls: type) -> List[str]:
+    """
+    Returns the source of each class in the MRO of `cls` that has one, and
+    that of the module of `cls` if it has none itself (as when it is built
+    with `type()`).
+    """
+    sources = []
+    for klass in cls.__mro__:
+        try:
+            sources.append(inspect.getsource(klass))
+        except (OSError, TypeError):
+            if klass is cls:
+                sources.append(inspect.getsource(sys.modules[cls.__module__]))
+    return sources
+
+
+def fingerprint(cls: type, utils: str) -> str:
+    """
+    Returns a hash of everything the outcome of the test case `cls` depends
+    on: its normalised `query`, its source and that of the classes it
+    inherits from (so its fixtures and test bodies), its baseline fixtures
+    and the source of `test/utils` (given as the hash `utils`).
+    """
+    content = json.dumps(
+        {
+            "query": normalise(getattr(cls, "query", None) or ""),
+            "source": _source(cls),
+            "baseline": [
+                [model.__name__, list(data)]
+                for model, data in getattr(cls, "baseline", ())
+            ],
+            "utils": utils,
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def load_state(path: str = STATE_FILE) -> Dict[str, Dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_state(state: Dict[str, Dict], path: str = STATE_FILE):
+    with open(path, "w") as file:
+        json.dump(state, file, indent=2, sort_keys=True)
+
+
+def _failures(result: unittest.TestResult):
+    """
+    Returns the ids of the tests with a failure or error in `result`, and
+    the names of the test cases with an error outside their tests (in
+    `setUpClass` or `tearDownClass`).
+    """
+    tests, classes = set(), set()
+    for test, _ in result.failures + result.errors:
+        if isinstance(test, unittest.TestCase):
+            tests.add(test.id())
+        else:
+            # Errors outside a test are reported as "setUpClass (<class>)"
+            match = re.search(r"\((.*)\)", str(test))
+            if match:
+                classes.add(match.group(1))
+    tests.update(test.id() for test in result.unexpectedSuccesses)
+    return tests, classes
+
+
+def run(
+        names: Optional[List[str]] = None,
+        run_all: bool = False,
+        state_file: str = STATE_FILE,
+        stream=sys.stderr
+) -> bool:
+    """
+    Runs the test cases under `test/` (or the tests named by `names`) whose
+    fingerprint changed since they last ran, or with tests that have not
+    passed since, and records their fingerprint and the tests that passed
+    in `state_file`. Everything is run when `run_all` is set. Returns
+    whether all the tests run passed.
+    """
+    classes: Dict[str, List[unittest.TestCase]] = {}
+    for test in iter_tests(load_suite(names)):
+        classes.setdefault(_class_name(type(test)), []).append(test)
+
+    state = load_state(state_file)
+    utils = _utils_fingerprint()
+    fingerprints = {
+        name: fingerprint(type(tests[0]), utils)
+        for name, tests in classes.items()
+    }
+    for name in classes:
+        if run_all or state.get(name, {}).get("fingerprint") \
+                != fingerprints[name]:
+            state[name] = {"fingerprint": fingerprints[name], "passed": []}
+    changed = [
+        name for name, tests in classes.items()
+        if {test.id() for test in tests} - set(state[name]["passed"])
+    ]
+    skipped = sum(
+        len(tests) for name, tests in classes.items() if name not in changed
+    )
+    if skipped:
+        stream.write(
+            f"Skipping {len(classes) - len(changed)} unchanged test cases "
+            f"that passed ({skipped} tests)\n"
+        )
+
+    result = unittest.TextTestRunner(stream=stream).run(
+        unittest.TestSuite(test for name in changed for test in classes[name])
+    )
+    failed_tests, failed_classes = _failures(result)
+    for name in changed:
+        if name in failed_classes:
+            state[name]["passed"] = []
+            continue
+        passed = set(state[name]["passed"]) | {
+            test.id() for test in classes[name]
+        }
+        state[name]["passed"] = sorted(passed - failed_tests)
+    save_state(state, state_file)
+    return result.wasSuccessful()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run only the test cases whose query, tests or fixtures "
+                    "changed since their last run, or that did not pass."
+    )
+    parser.add_argument(
+        "names", nargs="*",
+        help="test modules, classes or methods (default: all under test/)"
+    )
+    parser.add_argument(
+        "-a", "--all", action="store_true",
+        help="run every test case, whether it changed or not"
+    )
+    arguments = parser.parse_args()
+    sys.exit(0 if run(arguments.names, arguments.all) else 1)
+
+
+if __name__ == "__main__":
+    main()
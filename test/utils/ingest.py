@@ -0,0 +1,187 @@
+import decimal
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from test.utils.database import *
+from test.utils.sql import quote, quoted_table_name
+
+# Number of characters handed to PostgreSQL per read of the COPY stream
+COPY_BUFFER_SIZE = 64 * 1024
+
+# Representation of NULL in PostgreSQL's COPY text format
+COPY_NULL = "\\N"
+
+# Characters that must be escaped in PostgreSQL's COPY text format
+COPY_ESCAPES = str.maketrans({
+    "\\": "\\\\",
+    "\t": "\\t",
+    "\n": "\\n",
+    "\r": "\\r",
+})
+
+
+def _field_encoder(field) -> Callable[[Any], str]:
+    """
+    Returns a function encoding a single value of `field` in PostgreSQL's
+    COPY text format. The type checks happen once per field, not per value.
+    """
+    db_value = field.db_value
+    if isinstance(field, peewee.ForeignKeyField):
+        field = field.rel_field
+        db_value = lambda value, fk=db_value: field.db_value(fk(value))
+
+    if isinstance(field, peewee.FixedCharField):
+        # Pad like PostgreSQL does so CHAR(n) values round-trip unchanged
+        width = field.max_length
+        convert = lambda value: str(value).ljust(width)
+    elif isinstance(field, peewee.DecimalField):
+        # Go through `str` so floats such as 80.3 keep their literal value
+        exponent = decimal.Decimal(10) ** -field.decimal_places
+        convert = lambda value: str(
+            decimal.Decimal(str(value)).quantize(exponent)
+        )
+    elif isinstance(field, peewee.BooleanField):
+        convert = lambda value: "t" if value else "f"
+    elif isinstance(field, peewee.IntegerField):
+        return lambda value: COPY_NULL if value is None else str(int(value))
+    else:
+        convert = str
+
+    def encode(value) -> str:
+        if value is None:
+            return COPY_NULL
+        value = db_value(value)
+        if value is None:
+            return COPY_NULL
+        return convert(value).translate(COPY_ESCAPES)
+    return encode
+
+
+def _row_value(row: Dict[str, Any], field) -> Any:
+    """
+    Returns the value of `field` in `row`, or its default if missing.
+    """
+    if field.name in row:
+        return row[field.name]
+    if field.default is not None:
+        return field.default() if callable(field.default) else field.default
+    return None
+
+
+class CopyStream:
+    """
+    A read-only, file-like object that lazily encodes `rows` (dictionaries
+    of field name to value) of `model` in PostgreSQL's COPY text format.
+    Only the rows needed to satisfy each `read` are pulled from `rows`, so
+    generators of any length can be streamed in bounded memory. They are
+    copied into the table of `model` in `schema`, if given.
+    """
+
+    def __init__(
+            self,
+            model,
+            rows: Iterable[Dict[str, Any]],
+            schema: Optional[str] = None
+    ):
+        self.model = model
+        self.schema = schema
+        self.fields = list(model._meta.sorted_fields)
+        self.columns = [field.column_name for field in self.fields]
+        self.encoders = [_field_encoder(field) for field in self.fields]
+        self.rows_encoded = 0
+        self._lines = self._encode_rows(rows)
+        self._buffer: List[str] = []
+        self._buffered = 0
+
+    def _encode_rows(self, rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        fields = list(zip(self.fields, self.encoders))
+        for row in rows:
+            values = [
+                encode(_row_value(row, field)) for field, encode in fields
+            ]
+            self.rows_encoded += 1
+            yield "\t".join(values) + "\n"
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> str:
+        """
+        Returns up to `size` characters of encoded rows (or everything left
+        when `size` is negative), and an empty string once exhausted.
+        """
+        while size < 0 or self._buffered < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer.append(line)
+            self._buffered += len(line)
+
+        data = "".join(self._buffer)
+        if 0 <= size < len(data):
+            data, rest = data[:size], data[size:]
+            self._buffer = [rest]
+            self._buffered = len(rest)
+        else:
+            self._buffer = []
+            self._buffered = 0
+        return data
+
+    def copy_statement(self) -> str:
+        """
+        Returns the `COPY ... FROM STDIN` statement that reads this stream.
+        """
+        columns = ", ".join(quote(column) for column in self.columns)
+        return (
+            f"COPY {quoted_table_name(self.model, self.schema)} "
+            f"({columns}) FROM STDIN"
+        )
+
+
+def copy_instances(
+        model,
+        rows: Iterable[Dict[str, Any]],
+        database=db,
+        buffer_size: int = COPY_BUFFER_SIZE,
+        schema: Optional[str] = None
+) -> int:
+    """
+    Streams `rows` (dictionaries of field name to value, from any iterable
+    or generator) into the table of `model` (in `schema`, if given) with
+    `COPY FROM STDIN`. Returns the number of rows copied.
+    """
+    stream = CopyStream(model, rows, schema)
+    with database.atomic():
+        cursor = database.cursor()
+        cursor.copy_expert(stream.copy_statement(), stream, size=buffer_size)
+    return stream.rows_encoded
+
+
+def render_insert(
+        model,
+        rows: Iterable[Dict[str, Any]],
+        schema: Optional[str] = None,
+        database=db
+) -> Optional[str]:
+    """
+    Returns one multi-row `INSERT` of `rows` (dictionaries of field name to
+    value) into the table of `model` (in `schema`, if given), with the
+    values inlined so that it can be sent as part of a larger script.
+    Returns None if there are no rows.
+    """
+    fields = list(model._meta.sorted_fields)
+    placeholders = f"({', '.join(['%s'] * len(fields))})"
+    cursor = database.cursor()
+    values = [
+        cursor.mogrify(
+            placeholders,
+            [field.db_value(_row_value(row, field)) for field in fields]
+        ).decode()
+        for row in rows
+    ]
+    if not values:
+        return None
+    columns = ", ".join(quote(field.column_name) for field in fields)
+    return (
+        f"INSERT INTO {quoted_table_name(model, schema)} ({columns}) "
+        f"VALUES {', '.join(values)}"
+    )
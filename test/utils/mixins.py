@@ -1,45 +1,580 @@
-import logging
+import collections
+import contextlib
 import copy
+import decimal
+import itertools
+import logging
+import re
+import time
+import uuid
+import peewee
+import psycopg2
+import psycopg2.errorcodes
+import psycopg2.extensions
 
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List, Optional
 from test.utils.database import *
+from test.utils.cache import fingerprint, result_cache, schema_ddl
+from test.utils.ingest import copy_instances, render_insert
+from test.utils.results import ColumnarTable
+from test.utils.snapshots import get_schema_ddl
+from test.utils import vectorised
+from test.utils import budgets
+from test.utils.budgets import PerformanceBudget, shared_buffers
+from test.utils.plans import find_regressions, load_baseline, save_plan
+from test.utils.sql import find_select_body, quote, split_statements
+from test.utils.synthetic import load_generated_data
+from test.utils.timing import phase_timings, timed
+from test.utils.vectorised import numpy
+from test.utils.watchdog import QueryWatchdog
+
+
+# Error codes of the statements cancelled by `_guard_query()`
+TIMEOUT_ERROR_CODES = (
+    psycopg2.errorcodes.QUERY_CANCELED,
+    psycopg2.errorcodes.LOCK_NOT_AVAILABLE,
+)
+
+
+def _error_code(error: Exception):
+    """
+    Returns the SQLSTATE of a database `error`, or None.
+    """
+    # peewee leaves some errors (like QueryCanceled) unwrapped
+    return getattr(error, "pgcode", None) \
+        or getattr(error.__context__, "pgcode", None)
 
 
 class SqlQueriesTestCaseMixin:
     query = None
     table = None
+    # Maximum number of rows sent in a single multi-row INSERT
+    bulk_batch_size = 1000
+    # Run each test inside a transaction that is rolled back on teardown,
+    # instead of deleting every row and dropping `self.table`
+    transactional = False
+    # Fixtures as (model, data) pairs that every test of the test case
+    # shares. Loaded once by `_load_baseline()` in `setUpClass`.
+    baseline = ()
+    _baseline_transaction = None
+    # Tolerances of `_assert_records_equal()`: decimal places numbers are
+    # rounded to (None compares them exactly), and whether to normalise
+    # whitespace in strings
+    record_places = None
+    record_strip = False
+    # Maximum number of missing or unexpected records reported on failure
+    record_diff_limit = 20
+    # Rows fetched per round trip by `_iter_generated_table()`
+    result_itersize = 2000
+    # Absolute tolerance of the vectorised numeric column assertions
+    column_tolerance = 1e-6
+    # Capture the plan of the query with EXPLAIN (ANALYZE, BUFFERS) before
+    # running it (see `_capture_plan()`), saving it as JSON to
+    # `plan_directory` if set, and comparing it with the plan of the test in
+    # the baseline file `plan_baseline` if set
+    capture_plans = False
+    plan_directory = None
+    plan_baseline = None
+    plan = None
+    plan_regressions = ()
+    # Cache generated tables on disk (see `ResultCache`), keyed by the
+    # query, the fixtures and the DDL. A test whose key is cached creates no
+    # fixtures and runs no query: its generated table is replayed. Tests
+    # that stream rows (see `_stream_instances()`) are never cached
+    cache_results = False
+    _pending_fixtures = None
+    _cached_result = None
+    _replayed_fixtures = None
+    _streamed = False
+    # Limits in milliseconds (None for no limit) on the run time of each
+    # statement of the query and on its waits for locks, enforced by the
+    # server, and on the wall time of the whole query, after which it is
+    # cancelled from another connection. Exceeding one fails the test
+    statement_timeout = 30000
+    lock_timeout = 10000
+    query_timeout = 60000
+    # `PerformanceBudget`s of the query, checked by
+    # `_assert_performance_budgets()`, and the seed of the generated data
+    # and the number of runs they are measured with
+    performance_budgets = ()
+    budget_seed = 0
+    budget_repeats = 3
+    # Schema the i-th scenario of `_run_batch()` is loaded into, and whether
+    # the copies of the schema get its foreign keys. Queries cannot depend
+    # on them, but they catch fixtures referencing missing rows (at nearly
+    # twice the cost of creating the copies)
+    batch_schema = "{schema}_b{index}"
+    batch_foreign_keys = False
+    # Send the statements of a test in as few round trips as possible (as
+    # multi-statement scripts, psycopg2 having no pipeline mode): the
+    # fixtures are inserted by `_execute_query()`, in the same script as the
+    # query (`_create_instances()` then returns no instances), and the
+    # cleanup after the test is a single script
+    pipeline_statements = False
 
+    @timed("execute_query")
     def _execute_query(self):
         """
         Executes the current query that's being tested.
         """
-        db.execute_sql("SET search_path TO A2;")
-        db.execute_sql(self.query)
+        caching = self.cache_results and not self._streamed
+        if caching and self._use_cached_result():
+            return
+        script = self._flush_pending_fixtures()
+        with self._guard_query():
+            if self.capture_plans:
+                if script:
+                    db.execute_sql(";\n".join(script))
+                    script = []
+                self._capture_plan()
+            script.append(f"SET search_path TO {BaseModel._meta.schema}")
+            script.append(self._get_query())
+            db.execute_sql(";\n".join(script))
+        if caching:
+            self._cache_result()
+
+    @contextlib.contextmanager
+    def _guard_query(self):
+        """
+        Applies `self.statement_timeout` and `self.lock_timeout` to the
+        statements run in the block, and cancels them once
+        `self.query_timeout` has passed. A statement cancelled for either
+        reason fails the test as a performance failure, with the time the
+        block ran for.
+        """
+        settings = {
+            "statement_timeout": self.statement_timeout,
+            "lock_timeout": self.lock_timeout,
+        }
+        settings = {
+            name: value for name, value in settings.items()
+            if value is not None
+        }
+        if settings:
+            db.execute_sql("; ".join(
+                f"SET {name} = {int(value)}"
+                for name, value in settings.items()
+            ))
+        timeout = self.query_timeout
+        watchdog = QueryWatchdog(
+            db.connection().get_backend_pid(),
+            None if timeout is None else timeout / 1000
+        )
+        try:
+            with watchdog:
+                yield
+        except (peewee.DatabaseError, psycopg2.Error) as error:
+            code = _error_code(error)
+            if watchdog.cancelled:
+                reason = f"query_timeout of {timeout}ms"
+            elif code == psycopg2.errorcodes.QUERY_CANCELED:
+                reason = f"statement_timeout of {self.statement_timeout}ms"
+            elif code == psycopg2.errorcodes.LOCK_NOT_AVAILABLE:
+                reason = f"lock_timeout of {self.lock_timeout}ms"
+            else:
+                raise
+            message = (
+                f"Performance failure: the query was cancelled after "
+                f"{1000 * watchdog.elapsed:.0f}ms (over its {reason})"
+            )
+            logging.warning(f"{self.id()}: {message}")
+            raise self.failureException(message) from error
+        finally:
+            # An aborted transaction restores the settings when rolled back
+            aborted = db.connection().get_transaction_status() \
+                == psycopg2.extensions.TRANSACTION_STATUS_INERROR
+            if settings and not aborted:
+                db.execute_sql("; ".join(f"RESET {name}" for name in settings))
+
+    def _use_cached_result(self) -> bool:
+        """
+        Looks the generated table up in the result cache, and returns
+        whether it was found. Otherwise, creates the fixtures that
+        `_create_instances()` deferred, for the query to run on.
+        """
+        fixtures = type(self)._pending_fixtures or []
+        type(self)._pending_fixtures = None
+        self._cache_key = fingerprint(
+            self.query,
+            list(self.baseline) + fixtures,
+            schema_ddl(BaseModel._meta.schema)
+        )
+        self._cached_result = result_cache.get(self._cache_key)
+        if self._cached_result is not None:
+            self._replayed_fixtures = fixtures
+            return True
+        if not self.pipeline_statements:
+            for model, data in fixtures:
+                self._create_instances(model, data)
+        else:
+            # Sent along with the query by `_execute_query()`
+            type(self)._pending_fixtures = fixtures
+        return False
+
+    def _flush_pending_fixtures(self) -> List[str]:
+        """
+        Returns the INSERTs of the fixtures `_create_instances()` deferred
+        because `self.pipeline_statements` is set, and stops deferring.
+        """
+        fixtures = type(self)._pending_fixtures or []
+        type(self)._pending_fixtures = None
+        inserts = (render_insert(model, data) for model, data in fixtures)
+        return [insert for insert in inserts if insert]
+
+    def _cache_result(self):
+        """
+        Stores the table the query generated (if it did) in the result
+        cache, under the key `_use_cached_result()` computed. It is then
+        served from memory for the rest of the test.
+        """
+        table = f"{BaseModel._meta.schema}.{self.table}"
+        exists = db.execute_sql("SELECT to_regclass(%s)", (table,))
+        if exists.fetchone()[0] is None:
+            return
+        cursor = db.execute_sql(f"SELECT * FROM {table}")
+        columns = [column[0] for column in cursor.description]
+        rows = list(self._decode_rows(cursor.description, cursor.fetchall()))
+        result_cache.put(self._cache_key, columns, rows)
+        self._cached_result = {"columns": columns, "rows": rows}
+
+    def _get_query(self, schema: Optional[str] = None) -> str:
+        """
+        Returns `self.query`, with any `SET search_path TO A2` in it pointed
+        at `schema`, or by default at the schema the models currently use
+        (see `use_schema()`).
+        """
+        schema = schema or BaseModel._meta.schema
+        return re.sub(
+            r"(search_path\s*(?:TO|=)\s*)A2\b",
+            lambda match: match.group(1) + schema,
+            self.query,
+            flags=re.IGNORECASE
+        )
+
+    def _explain_query(self, *options: str) -> Dict[str, Any]:
+        """
+        Runs the statements of the query that come before the one filling
+        `self.table`, then `EXPLAIN (FORMAT JSON, *options)` of the SELECT
+        that creates it (or of the INSERT into it, see
+        `find_select_body()`), and returns the plan (with its "Plan" tree).
+        With the ANALYZE option the statement is actually run, so call this
+        inside a transaction or savepoint that is rolled back.
+        """
+        found = find_select_body(
+            split_statements(self._get_query()), self.table
+        )
+        if found is None:
+            raise ValueError(
+                f"The query does not fill {self.table} from a query"
+            )
+        setup, body = found
+        db.execute_sql(f"SET search_path TO {BaseModel._meta.schema}")
+        for statement in setup:
+            db.execute_sql(statement)
+        cursor = db.execute_sql(
+            f"EXPLAIN ({', '.join(('FORMAT JSON',) + options)}) {body}"
+        )
+        return cursor.fetchone()[0][0]
+
+    def _capture_plan(self):
+        """
+        Runs the SELECT of the query under EXPLAIN (ANALYZE, BUFFERS) and
+        rolls it back, keeping the plan in `self.plan`. Signs of a bad plan
+        (see `find_regressions()`) are logged and kept in
+        `self.plan_regressions`. A query cancelled for running too long (see
+        `_guard_query()`) is not run again: the error is raised.
+        """
+        try:
+            with db.atomic() as transaction:
+                self.plan = self._explain_query("ANALYZE", "BUFFERS")
+                transaction.rollback()
+        except Exception as error:
+            if _error_code(error) in TIMEOUT_ERROR_CODES:
+                raise
+            logging.warning(
+                f"Could not capture the plan of {self.id()}: {error}"
+            )
+            return
+
+        baseline = None
+        if self.plan_baseline:
+            baseline = load_baseline(self.plan_baseline).get(self.id())
+        self.plan_regressions = find_regressions(self.plan, baseline)
+        for regression in self.plan_regressions:
+            logging.warning(f"{self.id()}: {regression}")
+        if self.plan_directory:
+            save_plan(
+                self.plan_directory, self.id(), self.plan,
+                self.plan_regressions
+            )
+
+    def _assert_no_plan_regressions(self):
+        """
+        After running `self._execute_query()` with `self.capture_plans` set,
+        asserts that no sign of a bad plan was found.
+        """
+        if self.plan_regressions:
+            self.fail(
+                "The plan of the query regressed:\n"
+                + "\n".join(
+                    f"  {regression}" for regression in self.plan_regressions
+                )
+            )
+
+    def _measure_performance(self, scale: float) -> Dict[str, Any]:
+        """
+        Runs the query over the data `RegistrarGenerator` generates at
+        `scale` (with `self.budget_seed`), in place of the fixtures, and
+        returns the time of its fastest of `self.budget_repeats` runs in
+        milliseconds ("ms"), and the shared buffers ("shared_buffers") it
+        touched in the plan ("plan") EXPLAIN (ANALYZE, BUFFERS) returned.
+        Everything is rolled back.
+        """
+        times = []
+        with db.atomic() as transaction:
+            self._drop_generated_table()
+            self._destroy_all_instances()
+            load_generated_data(scale, self.budget_seed)
+            with db.savepoint() as savepoint, self._guard_query():
+                plan = self._explain_query("ANALYZE", "BUFFERS")
+                savepoint.rollback()
+            for _ in range(self.budget_repeats):
+                with db.savepoint() as savepoint, self._guard_query():
+                    start = time.perf_counter()
+                    db.execute_sql(
+                        f"SET search_path TO {BaseModel._meta.schema};\n"
+                        + self._get_query()
+                    )
+                    times.append(1000 * (time.perf_counter() - start))
+                    savepoint.rollback()
+            transaction.rollback()
+        return {
+            "ms": min(times),
+            "shared_buffers": shared_buffers(plan),
+            "plan": plan,
+        }
+
+    def _skip_unless_checking_budgets(self):
+        if not budgets.CHECK_BUDGETS:
+            self.skipTest("set CHECK_BUDGETS=1 to check performance budgets")
+
+    def _assert_within_budget(
+            self,
+            budget: PerformanceBudget,
+            measured: Dict[str, Any] = None
+    ):
+        """
+        Asserts that the query keeps to `budget`, as `measured` by
+        `self._measure_performance()` at its scale (measured if not given).
+        Skips the test unless `CHECK_BUDGETS` is set.
+        """
+        self._skip_unless_checking_budgets()
+        if measured is None:
+            measured = self._measure_performance(budget.scale)
+        logging.info(
+            f"{self.id()} at scale {budget.scale:g}: {measured['ms']:.1f}ms, "
+            f"{measured['shared_buffers']} shared buffers"
+        )
+        if budget.max_ms is not None and measured["ms"] > budget.max_ms:
+            self.fail(
+                f"Performance failure: the query took {measured['ms']:.1f}ms "
+                f"at scale {budget.scale:g}, over its budget of "
+                f"{budget.max_ms}ms"
+            )
+        if budget.max_shared_buffers is not None \
+                and measured["shared_buffers"] > budget.max_shared_buffers:
+            self.fail(
+                f"Performance failure: the query touched "
+                f"{measured['shared_buffers']} shared buffers at scale "
+                f"{budget.scale:g}, over its budget of "
+                f"{budget.max_shared_buffers}"
+            )
+
+    def _assert_query_time_under(self, milliseconds: float, scale: float):
+        """
+        Asserts that the query runs in at most `milliseconds` at `scale`.
+        """
+        self._assert_within_budget(
+            PerformanceBudget(scale, max_ms=milliseconds)
+        )
+
+    def _assert_shared_buffers_under(self, buffers: int, scale: float):
+        """
+        Asserts that the query touches at most `buffers` shared buffers at
+        `scale`.
+        """
+        self._assert_within_budget(
+            PerformanceBudget(scale, max_shared_buffers=buffers)
+        )
+
+    def _assert_performance_budgets(self):
+        """
+        Asserts that the query keeps to every budget in
+        `self.performance_budgets`, measuring it once per scale. Skips the
+        test unless `CHECK_BUDGETS` is set.
+        """
+        self._skip_unless_checking_budgets()
+        measured = {}
+        for budget in self.performance_budgets:
+            if budget.scale not in measured:
+                measured[budget.scale] = self._measure_performance(
+                    budget.scale
+                )
+            self._assert_within_budget(budget, measured[budget.scale])
+
+    @timed("run_batch")
+    def _run_batch(self, scenarios) -> List[List[Dict[str, Any]]]:
+        """
+        Runs the query over each of `scenarios` (lists of (model, data)
+        pairs, created on top of `self.baseline`) in one round trip, and
+        returns the rows it generated in each, in order. Every scenario
+        gets its own copy of the schema: the DDL, the fixtures and the query
+        of every copy are sent as a single script, ending with one UNION ALL
+        of all the generated tables. Everything is rolled back. An error in
+        any scenario fails the whole batch.
+        """
+        if not scenarios:
+            return []
+        schema = BaseModel._meta.schema
+        names = [
+            self.batch_schema.format(schema=schema, index=index)
+            for index in range(len(scenarios))
+        ]
+        ddl = [
+            statement for statement in get_schema_ddl(db, schema, names[0])
+            if self.batch_foreign_keys or "FOREIGN KEY" not in statement
+        ]
+
+        script = []
+        for name, fixtures in zip(names, scenarios):
+            script.extend(
+                statement.replace(quote(names[0]), quote(name))
+                for statement in ddl
+            )
+            for model, data in list(self.baseline) + list(fixtures):
+                insert = render_insert(model, data, name)
+                if insert:
+                    script.append(insert)
+            script.append(f"SET search_path TO {quote(name)}")
+            script.append(self._get_query(name))
+        script.append(" UNION ALL ".join(
+            f"SELECT {index} AS batch_scenario, * "
+            f"FROM {quote(name)}.{self.table}"
+            for index, name in enumerate(names)
+        ))
+
+        results = [[] for _ in scenarios]
+        with db.atomic() as transaction:
+            with self._guard_query():
+                cursor = db.execute_sql(";\n".join(script))
+            for row in self._decode_rows(
+                    cursor.description, cursor.fetchall()
+            ):
+                results[row.pop("batch_scenario")].append(row)
+            transaction.rollback()
+        return results
+
+    def _decode_rows(self, description, rows) -> Iterator[Dict[str, Any]]:
+        """
+        Turns `rows` of a cursor with `description` into dictionaries of
+        column name to value, decoded with the type decoders cached on the
+        connection (e.g. stripping bpchar padding).
+        """
+        columns = [column[0] for column in description]
+        type_decoders = db.connection().type_decoders
+        decoders = [
+            (idx, type_decoders[column[1]])
+            for idx, column in enumerate(description)
+            if column[1] in type_decoders
+        ]
+        for row in rows:
+            row_dict = dict(zip(columns, row))
+            for idx, decoder in decoders:
+                if row[idx] is not None:
+                    row_dict[columns[idx]] = decoder(row[idx])
+            yield row_dict
 
+    @timed("get_generated_table")
     def _get_generated_table(self) -> List[Dict[str, Any]]:
         """
         After running `self._execute_query()`, use this to retrieve the
         rows (with column names) of the table that was created.
         """
-        neat_table = []
+        if self._cached_result is not None:
+            return [dict(row) for row in self._cached_result["rows"]]
+        cursor = db.execute_sql(
+            f"SELECT * FROM {BaseModel._meta.schema}.{self.table}"
+        )
+        return list(self._decode_rows(cursor.description, cursor.fetchall()))
+
+    def _iter_generated_batches(self, itersize=None) -> Iterator[tuple]:
+        """
+        Yields (description, rows) pairs for batches of at most `itersize`
+        rows (defaults to `self.result_itersize`) of the table created by
+        `self._execute_query()`, fetched through a server-side cursor.
+        """
+        itersize = itersize or self.result_itersize
+        in_transaction = db.in_transaction()
+        cursor = db.connection().cursor(name=f"rows_{uuid.uuid4().hex}")
         try:
-            db.execute_sql("SET search_path TO A2;")
-            cursor = db.execute_sql(f"SELECT * FROM {self.table}")
-            columns = [column[0] for column in cursor.description]
-            # Get bpchar type - so we can strip
-            bpchar_type = db.execute_sql(
-                "SELECT oid FROM pg_type WHERE typname = 'bpchar'"
-            ).fetchall()[0][0]
-            for row in cursor.fetchall():
-                row_dict = dict()
-                for idx, item in enumerate(row):
-                    row_dict[columns[idx]] = item
-                    if cursor.description[idx][1] == bpchar_type:
-                        row_dict[columns[idx]] = item.rstrip()
-                neat_table.append(row_dict)
-        except Exception:
-            db.close()
-        return neat_table
+            cursor.execute(
+                f"SELECT * FROM {BaseModel._meta.schema}.{self.table}"
+            )
+            while True:
+                batch = cursor.fetchmany(itersize)
+                if not batch:
+                    break
+                yield cursor.description, batch
+        finally:
+            cursor.close()
+            if not in_transaction:
+                # End the transaction psycopg2 opened for the cursor
+                db.commit()
+
+    def _iter_generated_table(self, itersize=None) -> Iterator[Dict[str, Any]]:
+        """
+        After running `self._execute_query()`, use this to lazily iterate
+        over the rows (with column names) of the table that was created.
+        Rows are fetched `itersize` at a time (defaults to
+        `self.result_itersize`) through a server-side cursor, so memory stays
+        bounded however large the table is.
+        """
+        if self._cached_result is not None:
+            yield from (dict(row) for row in self._cached_result["rows"])
+            return
+        for description, batch in self._iter_generated_batches(itersize):
+            yield from self._decode_rows(description, batch)
+
+    @timed("get_generated_table")
+    def _get_generated_table_columnar(self, itersize=None) -> ColumnarTable:
+        """
+        After running `self._execute_query()`, use this to retrieve the
+        table that was created column by column, as a `ColumnarTable`
+        (integer columns in typed arrays, numeric columns as `Decimal`s).
+        Iterating over it gives row views, usable with
+        `self._assert_records_equal()`.
+        """
+        if self._cached_result is not None:
+            columns = self._cached_result["columns"]
+            rows = self._cached_result["rows"]
+            return ColumnarTable(columns, {
+                column: [row[column] for row in rows] for column in columns
+            })
+        batches = self._iter_generated_batches(itersize)
+        first = next(batches, None)
+        if first is None:
+            cursor = db.execute_sql(
+                f"SELECT * FROM {BaseModel._meta.schema}.{self.table} LIMIT 0"
+            )
+            return ColumnarTable.from_batches(
+                cursor.description, (), db.connection()
+            )
+        description, batch = first
+        return ColumnarTable.from_batches(
+            description,
+            itertools.chain([batch], (batch for _, batch in batches)),
+            db.connection()
+        )
 
     def _get_generated_table_columns(self) -> List[str]:
         """
@@ -50,20 +585,51 @@ class SqlQueriesTestCaseMixin:
             print("Table doesn't exist")
             exit()
 
-        db.execute_sql("SET search_path TO A2;")
-        cursor = db.execute_sql(f"SELECT * FROM {self.table}")
+        if self._cached_result is not None:
+            return list(self._cached_result["columns"])
+        cursor = db.execute_sql(
+            f"SELECT * FROM {BaseModel._meta.schema}.{self.table} LIMIT 0"
+        )
         return [column[0] for column in cursor.description]
 
-    def _create_instances(self, model, data):
+    @classmethod
+    @timed("create_instances")
+    def _create_instances(cls, model, data, batch_size=None):
         """
         Creates multiple instances (or rows) of `model` type in the database.
-        Returns these instances back.
+        Rows are sent as multi-row inserts of at most `batch_size` rows
+        (defaults to `self.bulk_batch_size`) instead of one insert per row.
+        Returns these instances back, or an empty list when the creation is
+        deferred because `cls.cache_results` (see `_use_cached_result()`) or
+        `cls.pipeline_statements` (see `_flush_pending_fixtures()`) is set.
         """
+        if cls._pending_fixtures is not None:
+            cls._pending_fixtures.append((model, list(data)))
+            return []
+        batch_size = batch_size or cls.bulk_batch_size
         created = []
-        for instance in data:
-            created.append(model.create(**instance))
+        with db.atomic():
+            for batch in peewee.chunked(data, batch_size):
+                created.extend(
+                    model.insert_many(batch).returning(model).execute()
+                )
         return created
 
+    def _stream_instances(self, model, data) -> int:
+        """
+        Streams rows of `model` type from `data` (any iterable or generator
+        of dictionaries) into the database with `COPY FROM STDIN`, without
+        materialising them. Meant for large synthetic datasets; returns the
+        number of rows copied rather than the instances. The rows are not
+        part of the result cache key, so a test streaming rows is not cached,
+        and the fixtures deferred until then are created first.
+        """
+        self._streamed = True
+        script = self._flush_pending_fixtures()
+        if script:
+            db.execute_sql(";\n".join(script))
+        return copy_instances(model, data)
+
     def _destroy_instances(self, model, instances):
         """
         Deletes multiple instances of `model` type in the database.
@@ -71,13 +637,19 @@ class SqlQueriesTestCaseMixin:
         for instance in instances:
             model.delete_instance(instance)
 
-    def _destroy_all_instances(self):
+    @timed("destroy_all_instances")
+    def _destroy_all_instances(self, drop_generated_table=False):
         """
-        Clears all the tables in the database.
+        Clears all the tables in the database, after dropping the table
+        named `self.table` if `drop_generated_table` is set (in the same
+        round trip).
         """
+        drop = f"DROP TABLE IF EXISTS {self.table};" \
+            if drop_generated_table else ""
         db.execute_sql(
-            """
-                SET search_path TO A2;
+            f"""
+                SET search_path TO {BaseModel._meta.schema};
+                {drop}
                 DELETE FROM prerequisites;
                 DELETE FROM studentCourse;
                 DELETE FROM courseSection;
@@ -88,47 +660,304 @@ class SqlQueriesTestCaseMixin:
             """
         )
 
+    @timed("drop_generated_table")
     def _drop_generated_table(self):
         """
         Drops the table named `self.table` in the database if exists.
         """
         db.execute_sql(
             f"""
-                SET search_path TO A2;
+                SET search_path TO {BaseModel._meta.schema};
                 DROP TABLE IF EXISTS {self.table};
             """
         )
 
+    @classmethod
+    def _load_baseline(cls):
+        """
+        Call from `setUpClass`. Connects and creates the `cls.baseline`
+        fixtures once for the whole test case, inside a transaction that
+        `cls._unload_baseline()` rolls back. While it is open, every test
+        runs inside a savepoint (see `self._begin_isolation()`), so only its
+        own rows are inserted and rolled back.
+        """
+        db.connect()
+        cls._baseline_transaction = db.transaction()
+        cls._baseline_transaction.__enter__()
+        try:
+            for model, data in cls.baseline:
+                cls._create_instances(model, data)
+        except Exception:
+            cls._unload_baseline()
+            raise
+
+    @classmethod
+    def _unload_baseline(cls):
+        """
+        Call from `tearDownClass`. Rolls back the fixtures created by
+        `cls._load_baseline()` and disconnects.
+        """
+        cls._baseline_transaction.rollback(begin=False)
+        cls._baseline_transaction.__exit__(None, None, None)
+        cls._baseline_transaction = None
+        db.close()
+
+    def _begin_isolation(self):
+        """
+        Call at the start of `setUp`, after connecting if the test case has
+        no baseline. Opens the savepoint (when a baseline is loaded) or the
+        transaction (when `self.transactional` is set) that the fixtures,
+        the query and the generated table are all created in.
+        """
+        phase_timings.current_test = self
+        self._cached_result = None
+        self._replayed_fixtures = None
+        self._streamed = False
+        if self.cache_results or self.pipeline_statements:
+            # Fixtures are only created if the generated table isn't cached,
+            # or along with the query when pipelining
+            type(self)._pending_fixtures = []
+        if self._baseline_transaction is not None:
+            self._transaction = db.savepoint()
+            self._transaction.__enter__()
+        elif self.transactional:
+            self._transaction = db.transaction()
+            self._transaction.__enter__()
+
+    def _end_isolation(self):
+        """
+        Call at the end of `tearDown`, before disconnecting if the test case
+        has no baseline. Undoes everything the test did, either with a
+        single ROLLBACK of what `self._begin_isolation()` opened, or by
+        dropping the generated table and clearing all the tables.
+        """
+        type(self)._pending_fixtures = None
+        try:
+            if self._baseline_transaction is not None or self.transactional:
+                self._rollback_isolation()
+            elif self.pipeline_statements:
+                self._destroy_all_instances(drop_generated_table=True)
+            else:
+                self._drop_generated_table()
+                self._destroy_all_instances()
+        finally:
+            phase_timings.current_test = None
+
+    @timed("rollback")
+    def _rollback_isolation(self):
+        """
+        Rolls back the savepoint or transaction `self._begin_isolation()`
+        opened.
+        """
+        if self._baseline_transaction is not None:
+            self._transaction.rollback()
+        else:
+            self._transaction.rollback(begin=False)
+        self._transaction.__exit__(None, None, None)
+
     def _save_generated_table_as(self, table_name):
         """
         After running `self._execute_query()`, use this to save the table
         in the database with name `table_name`.
         """
+        if self._replayed_fixtures is not None:
+            # The table was replayed from the result cache, so the fixtures
+            # and the query have yet to be run for it to exist
+            fixtures, self._replayed_fixtures = self._replayed_fixtures, None
+            for model, data in fixtures:
+                self._create_instances(model, data)
+            with self._guard_query():
+                db.execute_sql(
+                    f"SET search_path TO {BaseModel._meta.schema};\n"
+                    f"{self._get_query()}"
+                )
         db.execute_sql(
             f"""
-                SET search_path TO A2;
+                SET search_path TO {BaseModel._meta.schema};
                 DROP TABLE IF EXISTS {table_name};
                 CREATE TABLE {table_name} AS (SELECT * FROM {self.table});
             """
         )
 
-    def _assert_records_equal(self, actual, expected):
+    def _canonicalise_record(self, record, places=None, strip=False):
+        """
+        Returns `record` (a dictionary) as a hashable, order-independent
+        tuple of (column, value) pairs. Numbers are rounded to `places`
+        decimal places when given, and strings are stripped when `strip` is
+        set, so that records equal under those tolerances hash the same.
+        """
+        canonical = []
+        for column, value in record.items():
+            if places is not None and isinstance(
+                    value, (int, float, decimal.Decimal)
+            ) and not isinstance(value, bool):
+                value = decimal.Decimal(str(value)).quantize(
+                    decimal.Decimal(10) ** -places
+                )
+            elif strip and isinstance(value, str):
+                value = " ".join(value.split())
+            canonical.append((column, value))
+        return tuple(sorted(canonical))
+
+    def _assert_records_equal(
+            self,
+            actual,
+            expected,
+            places=None,
+            strip=None
+    ):
         """
         Asserts that `expected` is equal to `actual`. `actual` and `expected`
         are a list of dictionaries, with each dictionary representing a record
-        in the generated database.
+        in the generated database. `actual` may also be an iterator, such as
+        `self._iter_generated_table()`, consumed one record at a time without
+        being held in memory.
+        Records are compared as multisets, so their order does not matter
+        but duplicates do. Numbers are compared rounded to `places` decimal
+        places and strings with whitespace normalised when `strip` is set
+        (defaulting to `self.record_places` and `self.record_strip`).
         """
-        self.assertEqual(len(actual), len(expected))
+        places = self.record_places if places is None else places
+        strip = self.record_strip if strip is None else strip
+        limit = self.record_diff_limit
+        # Only the expected records are held: the actual ones are matched
+        # against them as they are consumed, and at most `limit` distinct
+        # unexpected records are kept for the failure message
+        missing = collections.Counter(
+            self._canonicalise_record(record, places, strip)
+            for record in expected
+        )
+        expected_count = sum(missing.values())
+        unexpected = collections.Counter()
+        generated = unexpected_count = 0
+        for record in actual:
+            generated += 1
+            record = self._canonicalise_record(record, places, strip)
+            if missing[record] > 0:
+                missing[record] -= 1
+                continue
+            unexpected_count += 1
+            if record in unexpected or len(unexpected) < limit:
+                unexpected[record] += 1
+        missing = +missing
+        if not missing and not unexpected_count:
+            return
 
-        # re_actual is `actual` but reformatted to match indexes of expected
-        re_actual = []
-        for expected_item in expected:
-            for actual_item in actual:
-                if expected_item == actual_item:
-                    re_actual.append(actual_item)
-                    break
+        def describe(records, count):
+            shown = records.most_common(limit)
+            lines = [
+                f"  {dict(record)}" + (f" (x{times})" if times > 1 else "")
+                for record, times in shown
+            ]
+            more = count - sum(times for _, times in shown)
+            if more:
+                lines.append(f"  ... and {more} more")
+            return "\n".join(lines) or "  (none)"
 
-        self.assertEqual(len(actual), len(re_actual))
-        # This may be pointless, but let's do it...
-        for idx in range(0, len(expected)):
-            self.assertEqual(re_actual[idx], expected[idx])
+        self.fail(
+            f"{generated} records generated, {expected_count} expected\n"
+            f"Missing records:\n"
+            f"{describe(missing, sum(missing.values()))}\n"
+            f"Unexpected records:\n{describe(unexpected, unexpected_count)}"
+        )
+
+    def _assert_column_sorted_equal(
+            self,
+            table: ColumnarTable,
+            column,
+            expected
+    ):
+        """
+        Asserts that column `column` of `table` (from
+        `self._get_generated_table_columnar()`) holds exactly the values of
+        `expected`, in any order. Both are sorted (NULLs last) and compared
+        as whole NumPy arrays.
+        """
+        actual = vectorised.as_array(table.column(column))
+        expected = vectorised.as_array(expected)
+        self.assertEqual(
+            len(actual), len(expected),
+            f"{column}: {len(actual)} values generated, "
+            f"{len(expected)} expected"
+        )
+        actual = vectorised.sort_values(actual)
+        expected = vectorised.sort_values(expected)
+        mismatches = numpy.flatnonzero(actual != expected)
+        if len(mismatches):
+            first = mismatches[0]
+            self.fail(
+                f"{column}: {len(mismatches)} sorted values differ, first "
+                f"{actual[first]} != {expected[first]}"
+            )
+
+    def _assert_column_close(
+            self,
+            table: ColumnarTable,
+            column,
+            expected,
+            tolerance=None
+    ):
+        """
+        Asserts that numeric column `column` of `table` (e.g. `avggrade`)
+        holds the values of `expected`, in any order, each within
+        `tolerance` (defaults to `self.column_tolerance`). `Decimal`s are
+        compared as floats, and NULLs only match NULLs.
+        """
+        tolerance = self.column_tolerance if tolerance is None else tolerance
+        actual = vectorised.as_array(table.column(column), numeric=True)
+        expected = vectorised.as_array(expected, numeric=True)
+        self.assertEqual(
+            len(actual), len(expected),
+            f"{column}: {len(actual)} values generated, "
+            f"{len(expected)} expected"
+        )
+        actual = numpy.sort(actual)
+        expected = numpy.sort(expected)
+        close = numpy.isclose(
+            actual, expected, rtol=0, atol=tolerance, equal_nan=True
+        )
+        if not close.all():
+            first = numpy.flatnonzero(~close)[0]
+            self.fail(
+                f"{column}: {int((~close).sum())} sorted values differ by "
+                f"more than {tolerance}, first {actual[first]} != "
+                f"{expected[first]}"
+            )
+
+    def _assert_group_extrema(
+            self,
+            table: ColumnarTable,
+            by,
+            column,
+            expected,
+            tolerance=None
+    ):
+        """
+        Asserts that, grouping the rows of `table` by column `by`, the
+        minimum and maximum of numeric column `column` in each group match
+        `expected` (a dictionary of group to (minimum, maximum)), within
+        `tolerance` (defaults to `self.column_tolerance`). NULLs are ignored
+        as by MIN and MAX, and a group with only NULLs expects (None, None).
+        """
+        tolerance = self.column_tolerance if tolerance is None else tolerance
+        actual = vectorised.group_extrema(
+            table.column(by), table.column(column)
+        )
+        self.assertEqual(
+            set(actual), set(expected), f"Groups of {by} differ"
+        )
+        groups = list(expected)
+        close = numpy.isclose(
+            numpy.array([actual[group] for group in groups], dtype=float),
+            numpy.array([expected[group] for group in groups], dtype=float),
+            rtol=0, atol=tolerance, equal_nan=True
+        )
+        wrong = numpy.flatnonzero(~close.all(axis=1))
+        if len(wrong):
+            self.fail(
+                f"(min, max) of {column} by {by} differ:\n" + "\n".join(
+                    f"  {groups[idx]!r}: {actual[groups[idx]]} != "
+                    f"{tuple(expected[groups[idx]])}"
+                    for idx in wrong[:self.record_diff_limit]
+                )
+            )
@@ -0,0 +1,154 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+import unittest
+
+from typing import Any, Dict, List, Optional
+from test.utils.database import *
+from test.utils.discovery import iter_tests, load_suite
+from test.utils.snapshots import create_schema_copies, drop_schemas
+
+# Name of the copy of the `a2` schema that the i-th worker runs in
+WORKER_SCHEMA = "a2_w{}"
+
+SEPARATOR = "-" * 70
+DOUBLE_SEPARATOR = "=" * 70
+
+
+def collect_test_groups(names: Optional[List[str]] = None) -> List[List[str]]:
+    """
+    Returns the ids of the tests under `test/` (or named by `names`),
+    grouped by test case class. A group is the unit handed to a worker,
+    so that each class loads its baseline fixtures once.
+    """
+    groups: Dict[type, List[str]] = {}
+    for test in iter_tests(load_suite(names)):
+        groups.setdefault(type(test), []).append(test.id())
+    return list(groups.values())
+
+
+def _init_worker(schemas):
+    """
+    Runs once in each worker process: claims one of the worker schemas.
+    """
+    use_schema(schemas.get())
+
+
+def _run_test_group(test_ids: List[str]) -> Dict[str, Any]:
+    """
+    Runs the tests `test_ids` in the current worker and returns a picklable
+    summary of the outcome.
+    """
+    suite = unittest.defaultTestLoader.loadTestsFromNames(test_ids)
+    result = unittest.TestResult()
+    try:
+        suite.run(result)
+    except Exception:
+        result.errors.append((test_ids[0], traceback.format_exc()))
+
+    def describe(outcomes):
+        return [(str(test), details) for test, details in outcomes]
+
+    return {
+        "tests_run": result.testsRun,
+        "failures": describe(result.failures),
+        "errors": describe(result.errors),
+        "skipped": describe(result.skipped),
+        "expected_failures": describe(result.expectedFailures),
+        "unexpected_successes": [
+            str(test) for test in result.unexpectedSuccesses
+        ],
+    }
+
+
+def run(
+        names: Optional[List[str]] = None,
+        workers: Optional[int] = None,
+        stream=sys.stderr
+) -> bool:
+    """
+    Runs the tests in parallel over `workers` processes (one per CPU by
+    default), each in its own copy of the `a2` schema, and writes merged
+    results to `stream` in unittest's format. Returns whether all passed.
+    """
+    groups = collect_test_groups(names)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(groups)))
+    schemas = [WORKER_SCHEMA.format(index) for index in range(workers)]
+
+    create_schema_copies(schemas)
+    if POOL_CONNECTIONS:
+        # Forked workers must not share the pooled connections
+        db.close_idle()
+    start = time.perf_counter()
+    try:
+        claims = multiprocessing.Queue()
+        for schema in schemas:
+            claims.put(schema)
+        with multiprocessing.Pool(
+                workers, initializer=_init_worker, initargs=(claims,)
+        ) as pool:
+            outcomes = pool.map(_run_test_group, groups, chunksize=1)
+    finally:
+        drop_schemas(schemas)
+    elapsed = time.perf_counter() - start
+
+    merged = {key: [] for key in (
+        "failures", "errors", "skipped",
+        "expected_failures", "unexpected_successes"
+    )}
+    tests_run = 0
+    for outcome in outcomes:
+        tests_run += outcome["tests_run"]
+        for key in merged:
+            merged[key].extend(outcome[key])
+
+    for flavour, key in (("ERROR", "errors"), ("FAIL", "failures")):
+        for description, details in merged[key]:
+            stream.write(f"{DOUBLE_SEPARATOR}\n{flavour}: {description}\n")
+            stream.write(f"{SEPARATOR}\n{details}\n")
+    stream.write(
+        f"{SEPARATOR}\nRan {tests_run} tests in {elapsed:.3f}s "
+        f"({workers} workers)\n\n"
+    )
+
+    counts = [
+        f"{label}={len(merged[key])}"
+        for label, key in (
+            ("failures", "failures"),
+            ("errors", "errors"),
+            ("skipped", "skipped"),
+            ("expected failures", "expected_failures"),
+            ("unexpected successes", "unexpected_successes"),
+        )
+        if merged[key]
+    ]
+    successful = not (
+        merged["failures"] or merged["errors"]
+        or merged["unexpected_successes"]
+    )
+    status = "OK" if successful else "FAILED"
+    stream.write(f"{status} ({', '.join(counts)})\n" if counts else f"{status}\n")
+    return successful
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the tests in parallel, one a2 schema per worker."
+    )
+    parser.add_argument(
+        "names", nargs="*",
+        help="test modules, classes or methods (default: all under test/)"
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="number of worker processes (default: number of CPUs)"
+    )
+    arguments = parser.parse_args()
+    sys.exit(0 if run(arguments.names, arguments.workers) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import functools
+import glob
+import json
+import os
+
+from typing import Any, Dict, Iterator, List, Optional
+
+# Tables whose sequential scans are flagged, as PostgreSQL names them
+WATCHED_TABLES = ("studentcourse",)
+# Rows a watched sequential scan must read (over all its loops) to be flagged
+SEQ_SCAN_MIN_ROWS = 1000
+# Estimated rows above which a nested loop is flagged
+NESTED_LOOP_MAX_ROWS = 10000
+# Increase of the total cost over the baseline that is flagged, both
+# relative and absolute (so that estimates over tiny fixtures, which drift
+# with the size of the tables on disk, are not flagged)
+COST_TOLERANCE = 0.2
+COST_MIN_INCREASE = 100
+
+
+def iter_nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Yields every node of `plan` (as returned by `EXPLAIN (FORMAT JSON)`,
+    or one of its nodes), parents before their children.
+    """
+    node = plan.get("Plan", plan)
+    yield node
+    for child in node.get("Plans", ()):
+        yield from iter_nodes(child)
+
+
+def _rows_read(node: Dict[str, Any]) -> float:
+    """
+    Returns the rows `node` read over all its loops: the actual count when
+    the plan was analysed, the estimate otherwise.
+    """
+    if "Actual Rows" not in node:
+        return node["Plan Rows"]
+    rows = node["Actual Rows"] + node.get("Rows Removed by Filter", 0)
+    return rows * node["Actual Loops"]
+
+
+def find_regressions(
+        plan: Dict[str, Any],
+        baseline: Optional[Dict[str, Any]] = None
+) -> List[str]:
+    """
+    Returns a description of each sign of a bad plan in `plan`: large
+    sequential scans of `WATCHED_TABLES`, nested loops over many rows, and
+    a total cost more than `COST_TOLERANCE` (and `COST_MIN_INCREASE`)
+    above that of the `baseline` plan when given.
+    """
+    regressions = []
+    for node in iter_nodes(plan):
+        relation = node.get("Relation Name", "")
+        if node["Node Type"] == "Seq Scan" and relation in WATCHED_TABLES \
+                and _rows_read(node) >= SEQ_SCAN_MIN_ROWS:
+            regressions.append(
+                f"Sequential scan of {relation} read "
+                f"{_rows_read(node):.0f} rows"
+            )
+        if node["Node Type"] == "Nested Loop" \
+                and node["Plan Rows"] > NESTED_LOOP_MAX_ROWS:
+            regressions.append(
+                f"Nested loop estimated to produce {node['Plan Rows']} rows"
+            )
+
+    if baseline is not None:
+        cost = plan["Plan"]["Total Cost"]
+        baseline_cost = baseline["Plan"]["Total Cost"]
+        if cost > baseline_cost * (1 + COST_TOLERANCE) \
+                and cost - baseline_cost > COST_MIN_INCREASE:
+            regressions.append(
+                f"Total cost {cost} is up from {baseline_cost} in the baseline"
+            )
+    return regressions
+
+
+@functools.lru_cache()
+def load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the baseline plans stored in the JSON file `path`, by test id,
+    or no plans if the file does not exist. Each file is only read once.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_plan(directory: str, test_id: str, plan, regressions: List[str]):
+    """
+    Writes the plan captured for the test `test_id`, and the regressions
+    found in it, to `<directory>/<test_id>.json`.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{test_id}.json"), "w") as file:
+        json.dump(
+            {"test": test_id, "plan": plan, "regressions": regressions},
+            file,
+            indent=2
+        )
+
+
+def merge_plans(directory: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the plans saved by `save_plan()` in `directory`, by test id,
+    in the format of a baseline file.
+    """
+    plans = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path) as file:
+            saved = json.load(file)
+        plans[saved["test"]] = saved["plan"]
+    return plans
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Make a baseline file out of the plans captured by a "
+                    "test run."
+    )
+    parser.add_argument("directory", help="directory the plans were saved in")
+    parser.add_argument("baseline", help="baseline file to write")
+    arguments = parser.parse_args()
+    with open(arguments.baseline, "w") as file:
+        json.dump(merge_plans(arguments.directory), file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import collections
+import decimal
+
+from typing import Any, Dict, Iterable, List, Tuple
+from test.utils.database import *
+from test.utils.enums import Semester
+
+# The term in progress, excluded from the averages of queries 5 and 7
+CURRENT_YEAR = 2021
+CURRENT_SEMESTER = Semester.FALL.value
+
+# Years whose CS enrollments query 3 counts
+ENROLLMENT_YEARS = range(2016, 2021)
+
+# Minimum number of CS students in a course offering for query 7
+MIN_CS_STUDENTS = 3
+
+
+def _normalise(model, row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns `row` (a fixture of `model`) as the database would give it
+    back: missing fields take their default, CHAR(n) values lose their
+    padding and NUMERIC values become `Decimal`s.
+    """
+    normalised = {}
+    for field in model._meta.sorted_fields:
+        if field.name in row:
+            value = row[field.name]
+        else:
+            value = field.default() if callable(field.default) \
+                else field.default
+        if value is not None:
+            if isinstance(field, peewee.FixedCharField):
+                value = str(value).rstrip()
+            elif isinstance(field, peewee.DecimalField):
+                value = decimal.Decimal(str(value))
+        normalised[field.name] = value
+    return normalised
+
+
+def _average(values: List[decimal.Decimal]) -> decimal.Decimal:
+    return sum(values, decimal.Decimal(0)) / len(values)
+
+
+class Registrar:
+    """
+    An in-memory copy of the registrar tables, indexed by the keys the
+    queries join on, so that `query1()` to `query7()` run in time linear in
+    the number of rows.
+    """
+
+    def __init__(self, fixtures: Iterable[Tuple[Any, Iterable[Dict]]] = ()):
+        """
+        Loads `fixtures`, (model, data) pairs as in
+        `SqlQueriesTestCaseMixin.baseline`.
+        """
+        self.rows = {model: [] for model in MODELS}
+        self._indexed = False
+        for model, data in fixtures:
+            self.add(model, data)
+
+    def add(self, model, data: Iterable[Dict[str, Any]]):
+        """
+        Adds the rows `data` of `model`, as given to `_create_instances()`.
+        """
+        self.rows[model].extend(_normalise(model, row) for row in data)
+        self._indexed = False
+
+    def _index(self):
+        """
+        (Re)builds the indexes if rows were added since they were last built.
+        """
+        if self._indexed:
+            return
+        self._indexed = True
+        self.departments = {
+            row["dcode"]: row for row in self.rows[Department]
+        }
+        self.students = {row["sid"]: row for row in self.rows[Student]}
+        self.courses = {
+            (row["cid"], row["dcode"]): row for row in self.rows[Course]
+        }
+        self.sections = {row["csid"]: row for row in self.rows[CourseSection]}
+        self.sections_by_course = collections.defaultdict(list)
+        for section in self.rows[CourseSection]:
+            self.sections_by_course[
+                (section["cid"], section["dcode"])
+            ].append(section)
+        self.enrollments_by_section = collections.defaultdict(list)
+        self.courses_by_student = collections.defaultdict(set)
+        for enrollment in self.rows[StudentCourse]:
+            section = self.sections[enrollment["csid"]]
+            self.enrollments_by_section[enrollment["csid"]].append(enrollment)
+            self.courses_by_student[enrollment["sid"]].add(
+                (section["cid"], section["dcode"])
+            )
+        self.prerequisites = collections.defaultdict(list)
+        for prerequisite in self.rows[Prerequisites]:
+            self.prerequisites[
+                (prerequisite["cid"], prerequisite["dcode"])
+            ].append((prerequisite["pcid"], prerequisite["pdcode"]))
+
+    def _in_current_term(self, section) -> bool:
+        return (section["year"], section["semester"]) == (
+            CURRENT_YEAR, CURRENT_SEMESTER
+        )
+
+    def query1(self) -> List[Dict[str, Any]]:
+        """
+        Departments with the most instructors without a PhD.
+        """
+        counts = collections.Counter(
+            row["dcode"] for row in self.rows[Instructor]
+            if row["idegree"] != "PhD"
+        )
+        if not counts:
+            return []
+        most = max(counts.values())
+        return [
+            {"dname": self.departments[dcode]["dname"]}
+            for dcode, count in counts.items() if count == most
+        ]
+
+    def query2(self) -> List[Dict[str, Any]]:
+        """
+        Number of female fourth year students in Computer Science.
+        """
+        return [{"num": sum(
+            1 for row in self.rows[Student]
+            if row["sex"] == "F" and row["yearofstudy"] == 4
+            and row["dcode"] == "CSC"
+        )}]
+
+    def query3(self) -> List[Dict[str, Any]]:
+        """
+        Years from 2016 to 2020 with the most enrollments in Computer
+        Science course sections.
+        """
+        enrollments = collections.Counter()
+        for csid, rows in self.enrollments_by_section.items():
+            section = self.sections[csid]
+            if section["dcode"] == "CSC" \
+                    and section["year"] in ENROLLMENT_YEARS:
+                enrollments[section["year"]] += len(rows)
+        if not enrollments:
+            return []
+        most = max(enrollments.values())
+        return [
+            {"year": year, "enrollment": count}
+            for year, count in sorted(enrollments.items()) if count == most
+        ]
+
+    def query4(self) -> List[Dict[str, Any]]:
+        """
+        Computer Science courses only ever offered in the summer semester.
+        """
+        return [
+            {"cname": course["cname"]}
+            for key, course in sorted(
+                self.courses.items(), key=lambda item: item[0][0],
+                reverse=True
+            )
+            if key[1] == "CSC" and self.sections_by_course.get(key) and all(
+                section["semester"] == Semester.SUMMER.value
+                for section in self.sections_by_course[key]
+            )
+        ]
+
+    def query5(self) -> List[Dict[str, Any]]:
+        """
+        Students with the highest average grade in their department,
+        ignoring courses of the current term.
+        """
+        grades = collections.defaultdict(list)
+        for csid, rows in self.enrollments_by_section.items():
+            if self._in_current_term(self.sections[csid]):
+                continue
+            for enrollment in rows:
+                grades[enrollment["sid"]].append(enrollment["grade"])
+
+        averages = {sid: _average(values) for sid, values in grades.items()}
+        highest = {}
+        for sid, average in averages.items():
+            dcode = self.students[sid]["dcode"]
+            highest[dcode] = max(highest.get(dcode, average), average)
+        return [
+            {
+                "dept": self.departments[student["dcode"]]["dname"],
+                "sid": sid,
+                "sfirstname": student["sfirstname"],
+                "slastname": student["slastname"],
+                "avggrade": average,
+            }
+            for sid, average in averages.items()
+            for student in (self.students[sid],)
+            if average == highest[student["dcode"]]
+        ]
+
+    def query6(self) -> List[Dict[str, Any]]:
+        """
+        Enrollments of students in courses without having taken every
+        prerequisite of the course.
+        """
+        results = []
+        for enrollment in self.rows[StudentCourse]:
+            section = self.sections[enrollment["csid"]]
+            key = (section["cid"], section["dcode"])
+            taken = self.courses_by_student[enrollment["sid"]]
+            if any(
+                prerequisite not in taken
+                for prerequisite in self.prerequisites.get(key, ())
+            ):
+                student = self.students[enrollment["sid"]]
+                results.append({
+                    "fname": student["sfirstname"],
+                    "lname": student["slastname"],
+                    "cname": self.courses[key]["cname"],
+                    "year": section["year"],
+                    "semester": section["semester"],
+                })
+        return results
+
+    def query7(self) -> List[Dict[str, Any]]:
+        """
+        For each course, its past offerings with at least three Computer
+        Science students that have the highest and the lowest average mark
+        (listed once as each).
+        """
+        offerings = collections.defaultdict(list)
+        for csid, rows in self.enrollments_by_section.items():
+            section = self.sections[csid]
+            if self._in_current_term(section):
+                continue
+            cs_students = sum(
+                1 for enrollment in rows
+                if self.students[enrollment["sid"]]["dcode"] == "CSC"
+            )
+            if cs_students >= MIN_CS_STUDENTS:
+                offerings[(section["cid"], section["dcode"])].append((
+                    section,
+                    _average([enrollment["grade"] for enrollment in rows])
+                ))
+
+        results = []
+        for extreme in (max, min):
+            for key, marks in offerings.items():
+                target = extreme(average for _, average in marks)
+                results.extend(
+                    {
+                        "cname": self.courses[key]["cname"],
+                        "semester": section["semester"],
+                        "year": section["year"],
+                        "avgmark": average,
+                    }
+                    for section, average in marks if average == target
+                )
+        return results
+
+    def query(self, number: int) -> List[Dict[str, Any]]:
+        """
+        Returns the expected rows of the `queryN` table for query `number`.
+        """
+        self._index()
+        return getattr(self, f"query{number}")()
@@ -0,0 +1,127 @@
+import array
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, MutableSequence, Tuple
+
+# Array type codes for the integer types stored in typed arrays
+INTEGER_TYPECODES = {
+    "int2": "h",
+    "int4": "i",
+    "int8": "q",
+}
+
+
+class RowView(Mapping):
+    """
+    A read-only view of one row of a `ColumnarTable`, behaving like the
+    dictionary `SqlQueriesTestCaseMixin._get_generated_table()` would give.
+    Values are only looked up in the columns when accessed.
+    """
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "ColumnarTable", index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, column: str) -> Any:
+        return self._table.column(column)[self._index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.columns)
+
+    def __len__(self) -> int:
+        return len(self._table.columns)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class ColumnarTable:
+    """
+    The rows of a generated table, stored column by column: a list of
+    column names and, for each, one sequence of values. Integer columns
+    without NULLs are compact `array.array`s, numeric columns hold
+    `Decimal`s, and other columns are plain lists. Rows are available on
+    demand as `RowView`s.
+    """
+
+    def __init__(self, columns: List[str], data: Dict[str, MutableSequence]):
+        self.columns = columns
+        self._data = data
+
+    @classmethod
+    def from_batches(
+            cls,
+            description,
+            batches: Iterable[List[Tuple]],
+            connection
+    ) -> "ColumnarTable":
+        """
+        Builds a table from `batches` of rows of a cursor with
+        `description`, decoding values with the type metadata cached on
+        `connection` (see `TypedConnection`). Batches are transposed and
+        appended column by column, so only one batch of rows is held at once.
+        """
+        columns = [column[0] for column in description]
+        typecodes = {
+            connection.type_oids[name]: typecode
+            for name, typecode in INTEGER_TYPECODES.items()
+            if name in connection.type_oids
+        }
+        decoders = [
+            connection.type_decoders.get(column[1]) for column in description
+        ]
+        data = [
+            array.array(typecodes[column[1]]) if column[1] in typecodes
+            else []
+            for column in description
+        ]
+
+        for batch in batches:
+            for idx, values in enumerate(zip(*batch)):
+                decoder = decoders[idx]
+                if decoder is not None:
+                    values = [
+                        value if value is None else decoder(value)
+                        for value in values
+                    ]
+                if isinstance(data[idx], array.array) and None in values:
+                    # NULLs cannot be stored in a typed array
+                    data[idx] = list(data[idx])
+                data[idx].extend(values)
+
+        return cls(columns, dict(zip(columns, data)))
+
+    def column(self, name: str) -> MutableSequence:
+        """
+        Returns all the values of the column `name`.
+        """
+        return self._data[name]
+
+    def row(self, index: int) -> RowView:
+        """
+        Returns a view of the row at `index`.
+        """
+        if not -len(self) <= index < len(self):
+            raise IndexError("row index out of range")
+        return RowView(self, index % len(self))
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """
+        Returns every row as a dictionary, like
+        `SqlQueriesTestCaseMixin._get_generated_table()`.
+        """
+        return [dict(zip(self.columns, values)) for values in zip(
+            *(self._data[column] for column in self.columns)
+        )]
+
+    def __len__(self) -> int:
+        if not self.columns:
+            return 0
+        return len(self._data[self.columns[0]])
+
+    def __iter__(self) -> Iterator[RowView]:
+        return (RowView(self, index) for index in range(len(self)))
+
+    def __repr__(self):
+        return f"<ColumnarTable {self.columns} ({len(self)} rows)>"
@@ -0,0 +1,206 @@
+import contextlib
+import os
+import psycopg2
+
+from typing import Iterator, List, Optional
+from test.utils.database import *
+from test.utils.ingest import copy_instances
+from test.utils.sql import quote
+
+
+def get_schema_ddl(
+        database=db,
+        schema: str = "a2",
+        target: Optional[str] = None
+) -> List[str]:
+    """
+    Reads the catalog of `database` and returns the statements that
+    recreate the tables of `MODELS` in `schema`, with their columns,
+    defaults, keys and constraints. When `target` is given, the tables (and
+    the references between them) are created in that schema instead.
+    """
+    target = target or schema
+    tables = [model._meta.table_name for model in MODELS]
+    with database.atomic():
+        # Make pg_get_constraintdef() schema qualify every reference. Inside
+        # a transaction this is a savepoint, whose release keeps what SET
+        # LOCAL did, so the search_path is put back by hand afterwards
+        search_path = database.execute_sql("SHOW search_path").fetchone()[0]
+        database.execute_sql("SET LOCAL search_path TO pg_catalog")
+        columns = database.execute_sql(
+            """
+                SELECT c.relname, a.attname,
+                       format_type(a.atttypid, a.atttypmod), a.attnotnull,
+                       pg_get_expr(d.adbin, d.adrelid)
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                JOIN pg_attribute a ON a.attrelid = c.oid
+                LEFT JOIN pg_attrdef d
+                    ON d.adrelid = c.oid AND d.adnum = a.attnum
+                WHERE n.nspname = %s AND c.relname = ANY(%s)
+                    AND a.attnum > 0 AND NOT a.attisdropped
+                ORDER BY a.attnum
+            """,
+            (schema, tables)
+        ).fetchall()
+        constraints = database.execute_sql(
+            """
+                SELECT c.relname, k.conname, pg_get_constraintdef(k.oid)
+                FROM pg_constraint k
+                JOIN pg_class c ON c.oid = k.conrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = %s AND c.relname = ANY(%s)
+                ORDER BY k.contype = 'f', k.conname
+            """,
+            (schema, tables)
+        ).fetchall()
+        database.execute_sql(
+            "SELECT set_config('search_path', %s, true)", (search_path,)
+        )
+
+    definitions = {table: [] for table in tables}
+    for table, column, column_type, not_null, default in columns:
+        definition = f"{quote(column)} {column_type}"
+        if default is not None:
+            definition += f" DEFAULT {default}"
+        if not_null:
+            definition += " NOT NULL"
+        definitions[table].append(definition)
+
+    statements = [f"CREATE SCHEMA IF NOT EXISTS {quote(target)}"]
+    for table in tables:
+        statements.append(
+            f"CREATE TABLE {quote(target)}.{quote(table)} "
+            f"({', '.join(definitions[table])})"
+        )
+    for table, name, definition in constraints:
+        definition = definition.replace(
+            f"REFERENCES {schema}.", f"REFERENCES {quote(target)}."
+        )
+        statements.append(
+            f"ALTER TABLE {quote(target)}.{quote(table)} "
+            f"ADD CONSTRAINT {quote(name)} {definition}"
+        )
+    return statements
+
+
+def create_schema_copies(schemas: List[str], source: str = "a2"):
+    """
+    Creates (or replaces) each of `schemas` as an empty copy of the tables
+    of the schema `source`, over a connection of its own that is closed
+    afterwards.
+    """
+    with db.connection_context():
+        statements = {
+            schema: get_schema_ddl(db, source, schema) for schema in schemas
+        }
+        with db.atomic():
+            for schema in schemas:
+                db.execute_sql(
+                    f"DROP SCHEMA IF EXISTS {quote(schema)} CASCADE"
+                )
+                for statement in statements[schema]:
+                    db.execute_sql(statement)
+
+
+def drop_schemas(schemas: List[str]):
+    """
+    Drops each of `schemas` and everything in it, over a connection of its
+    own that is closed afterwards.
+    """
+    with db.connection_context():
+        with db.atomic():
+            for schema in schemas:
+                db.execute_sql(
+                    f"DROP SCHEMA IF EXISTS {quote(schema)} CASCADE"
+                )
+
+
+def _execute_outside_transaction(*statements: str):
+    """
+    Runs `statements` on a fresh autocommit connection to the configured
+    database, since CREATE/DROP DATABASE cannot run inside a transaction.
+    """
+    connection = psycopg2.connect(database=db.database, **db.connect_params)
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    finally:
+        connection.close()
+
+
+def drop_database(name: str):
+    """
+    Drops the database `name` if it exists.
+    """
+    _execute_outside_transaction(f"DROP DATABASE IF EXISTS {quote(name)}")
+
+
+def create_snapshot(name: str, fixtures=(), schema: str = "a2"):
+    """
+    Creates (or replaces) the template database `name` holding `schema`
+    as defined in the configured database, populated with `fixtures`
+    ((model, data) pairs, as in `SqlQueriesTestCaseMixin.baseline`).
+    Clones of it are then fully populated without replaying any insert.
+    """
+    if db.is_closed():
+        with db.connection_context():
+            statements = get_schema_ddl(db, schema)
+    else:
+        statements = get_schema_ddl(db, schema)
+
+    drop_database(name)
+    _execute_outside_transaction(f"CREATE DATABASE {quote(name)}")
+    template = peewee.PostgresqlDatabase(name, **db.connect_params)
+    with template.connection_context():
+        with template.atomic():
+            for statement in statements:
+                template.execute_sql(statement)
+            for model, data in fixtures:
+                copy_instances(model, data, database=template)
+
+
+def clone_snapshot(name: str, clone: str):
+    """
+    Creates (or replaces) the database `clone` as a copy of the template
+    database `name` made by `create_snapshot()`.
+    """
+    drop_database(clone)
+    _execute_outside_transaction(
+        f"CREATE DATABASE {quote(clone)} TEMPLATE {quote(name)}"
+    )
+
+
+def use_database(name: str) -> str:
+    """
+    Points `db`, and so every model, at the database `name`. Closes the
+    current connection if open. Returns the name of the previous database.
+    """
+    previous = db.database
+    if POOL_CONNECTIONS:
+        # Keep the size limit of the pool, and close the pooled connections,
+        # which still point at the previous database
+        db.init(name, max_connections=db._max_connections)
+        db.close_idle()
+    else:
+        db.init(name)
+    return previous
+
+
+@contextlib.contextmanager
+def cloned_snapshot(name: str, clone: Optional[str] = None) -> Iterator[str]:
+    """
+    Clones the template database `name` (by default into a database named
+    after it and the current process, so workers never collide), points
+    `db` at the clone while the block runs, then drops the clone.
+    """
+    clone = clone or f"{name}_{os.getpid()}"
+    clone_snapshot(name, clone)
+    previous = use_database(clone)
+    try:
+        yield clone
+    finally:
+        use_database(previous)
+        drop_database(clone)
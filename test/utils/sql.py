@@ -0,0 +1,120 @@
+import re
+
+from typing import List, Optional, Tuple
+
+# Parts of SQL text that may contain a `;` without ending the statement
+_TOKENS = re.compile(
+    r"""
+        '(?:[^']|'')*'                  # string literal
+      | "(?:[^"]|"")*"                  # quoted identifier
+      | --[^\n]*                        # line comment
+      | /\*.*?\*/                       # block comment
+      | (\$[A-Za-z_0-9]*\$).*?\1        # dollar quoted string
+      | ;                               # end of a statement
+    """,
+    re.DOTALL | re.VERBOSE
+)
+
+
+def quote(name: str) -> str:
+    """
+    Returns `name` as a quoted SQL identifier.
+    """
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def quoted_table_name(model, schema: Optional[str] = None) -> str:
+    """
+    Returns the schema qualified, quoted name of the table behind `model`,
+    in `schema` if given instead of the schema of the model.
+    """
+    meta = model._meta
+    schema = schema or meta.schema
+    if schema:
+        return f"{quote(schema)}.{quote(meta.table_name)}"
+    return quote(meta.table_name)
+
+
+def strip_comments(sql: str) -> str:
+    """
+    Returns `sql` with its comments replaced by spaces.
+    """
+    return _TOKENS.sub(
+        lambda match: " " if match.group().startswith(("--", "/*"))
+        else match.group(),
+        sql
+    )
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Splits `sql` into its statements, without the `;` ending them. Semicolons
+    in strings, quoted identifiers and comments are left alone, and
+    statements holding only comments are dropped.
+    """
+    statements = []
+    start = 0
+    for match in _TOKENS.finditer(sql):
+        if match.group() == ";":
+            statements.append(sql[start:match.start()])
+            start = match.end()
+    statements.append(sql[start:])
+    return [
+        statement.strip() for statement in statements
+        if strip_comments(statement).strip()
+    ]
+
+
+def find_select_body(
+        statements: List[str],
+        table: str
+) -> Optional[Tuple[List[str], str]]:
+    """
+    Finds the last of `statements` that fills `table` from a query, either
+    creating it (as a table or view) with `AS` or inserting into it, and
+    returns the statements before it together with the statement to
+    EXPLAIN: the query of a `CREATE ... AS`, or the `INSERT` itself.
+    Returns None if no statement fills `table` that way.
+    """
+    name = rf"(?:\w+\.)?\"?{re.escape(table)}\"?"
+    creates = re.compile(
+        r"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMP(?:ORARY)?\s+)?"
+        rf"(?:TABLE|VIEW)\s+(?:IF\s+NOT\s+EXISTS\s+)?{name}\s*"
+        r"(?:\([^)]*\)\s*)?AS\s+(.*)$",
+        re.IGNORECASE | re.DOTALL
+    )
+    inserts = re.compile(
+        rf"^\s*INSERT\s+INTO\s+{name}(?![\w.])", re.IGNORECASE
+    )
+    for index in range(len(statements) - 1, -1, -1):
+        statement = strip_comments(statements[index])
+        match = creates.match(statement)
+        if match:
+            return statements[:index], match.group(1).strip()
+        if inserts.match(statement):
+            return statements[:index], statement.strip()
+    return None
+
+
+def normalise(sql: str) -> str:
+    """
+    Returns `sql` without comments and with runs of whitespace outside
+    strings and quoted identifiers collapsed, so that queries differing
+    only in layout normalise the same.
+    """
+    parts = []
+    gap = []
+    start = 0
+    for match in _TOKENS.finditer(sql):
+        gap.append(sql[start:match.start()])
+        token = match.group()
+        if token.startswith(("--", "/*")):
+            gap.append(" ")
+        else:
+            parts.append(re.sub(r"\s+", " ", "".join(gap)))
+            parts.append(token)
+            gap = []
+        start = match.end()
+    gap.append(sql[start:])
+    parts.append(re.sub(r"\s+", " ", "".join(gap)))
+    return "".join(parts).strip()
@@ -0,0 +1,267 @@
+import random
+
+from typing import Any, Dict, Iterator, List, Tuple
+from test.utils.database import *
+from test.utils.enums import Semester
+from test.utils.ingest import copy_instances
+from test.utils.sql import quoted_table_name
+
+# Rows per table at scale factor 1; every table grows linearly with the
+# scale factor, except departments which are capped by `DEPARTMENT_NAMES`
+BASE_COUNTS = {
+    "departments": 10,
+    "instructors": 60,
+    "courses": 120,
+    "students": 2000,
+}
+
+# Academic years course sections are offered in (2021 is the current year)
+YEARS = range(2014, 2022)
+
+DEPARTMENT_NAMES = {
+    "CSC": "Computer Science",
+    "MGM": "Business",
+    "AST": "Astronomy",
+    "MAT": "Mathematics",
+    "PHY": "Physics",
+    "CHM": "Chemistry",
+    "BIO": "Biology",
+    "ECO": "Economics",
+    "PSY": "Psychology",
+    "ENG": "English",
+    "HIS": "History",
+    "PHL": "Philosophy",
+    "LIN": "Linguistics",
+    "STA": "Statistics",
+    "POL": "Political Science",
+    "SOC": "Sociology",
+}
+
+FIRST_NAMES = [
+    "Alvin", "Sonya", "Balaji", "George", "Kelly", "Jason", "Thierry",
+    "Purva", "David", "Walter", "Maria", "Wei", "Priya", "Omar", "Chloe",
+    "Lucas", "Aisha", "Mateo", "Yuki", "Noah",
+]
+LAST_NAMES = [
+    "Tang", "Zhang", "Babu", "Li", "Smith", "Bourne", "Sans", "Gawde",
+    "Lee", "Willy", "Garcia", "Chen", "Patel", "Hassan", "Martin", "Nguyen",
+    "Kim", "Singh", "Brown", "Wilson",
+]
+COURSE_TOPICS = ["Intro", "Topics", "Advanced", "Applied", "Seminar"]
+
+# Highest degrees held by instructors, with their relative frequencies
+DEGREES = {"PhD": 6, "MsC": 3, "BsC": 1}
+
+# Sections per offering, and students per section
+SECTIONS_PER_OFFERING = (1, 3)
+SECTION_SIZE = (5, 60)
+# Probability that a course is offered in a given term
+OFFERING_RATE = 0.35
+# Share of a section's students that belong to the course's department
+MAJOR_SHARE = 0.7
+# Mean and standard deviation of grades, clipped to [0, 100]
+GRADE_MEAN = 72
+GRADE_STDDEV = 13
+
+
+class RegistrarGenerator:
+    """
+    A deterministic generator of registrar data. The number of rows grows
+    linearly with `scale` (TPC-style: scale 1 gives 2000 students and
+    around 65 000 enrollments), and the same `scale` and `seed` always give
+    the same rows.
+
+    Each table is a stream: `students()`, `enrollments()`, ... return fresh
+    generators of dictionaries of field name to value, as taken by
+    `copy_instances()`, `SqlQueriesTestCaseMixin._stream_instances()` or
+    `create_snapshot()`. Only the keys other tables refer to are kept in
+    memory.
+    """
+
+    def __init__(self, scale: float = 1.0, seed: int = 0):
+        self.scale = scale
+        self.seed = seed
+        counts = {
+            table: max(1, round(count * scale))
+            for table, count in BASE_COUNTS.items()
+        }
+        counts["departments"] = min(
+            max(3, counts["departments"]), len(DEPARTMENT_NAMES)
+        )
+        self.counts = counts
+        self.department_codes = list(DEPARTMENT_NAMES)[:counts["departments"]]
+
+        rng = self._random("skeleton")
+        self.instructor_departments = [
+            rng.choice(self.department_codes)
+            for _ in range(counts["instructors"])
+        ]
+        self.student_departments = [
+            rng.choice(self.department_codes)
+            for _ in range(counts["students"])
+        ]
+        # Course numbers are unique, so (cid, dcode) keys are too
+        self.course_keys = [
+            (cid, rng.choice(self.department_codes))
+            for cid in range(1, counts["courses"] + 1)
+        ]
+        self.section_keys = self._plan_sections(rng)
+
+    def _random(self, stream: str) -> random.Random:
+        """
+        Returns the random number generator of `stream`, so that each table
+        is reproducible on its own, whichever are generated.
+        """
+        return random.Random(f"{self.seed}/{self.scale}/{stream}")
+
+    def _plan_sections(self, rng: random.Random) -> List[Tuple]:
+        """
+        Returns the (csid, cid, dcode, year, semester, section) of every
+        course section: each course is offered in some of the terms of
+        `YEARS`, with one or more sections per offering.
+        """
+        sections = []
+        terms = [
+            (year, semester.value) for year in YEARS for semester in Semester
+        ]
+        for cid, dcode in self.course_keys:
+            for year, semester in terms:
+                if rng.random() >= OFFERING_RATE:
+                    continue
+                count = rng.randint(*SECTIONS_PER_OFFERING)
+                for number in range(1, count + 1):
+                    sections.append((
+                        len(sections) + 1, cid, dcode, year, semester,
+                        f"LEC{number:02d}"
+                    ))
+        return sections
+
+    def _name(self, rng: random.Random) -> Tuple[str, str]:
+        return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+    def departments(self) -> Iterator[Dict[str, Any]]:
+        for dcode in self.department_codes:
+            yield {"dcode": dcode, "dname": DEPARTMENT_NAMES[dcode]}
+
+    def students(self) -> Iterator[Dict[str, Any]]:
+        rng = self._random("students")
+        for sid, dcode in enumerate(self.student_departments, start=1):
+            first, last = self._name(rng)
+            year_of_study = rng.randint(1, 4)
+            yield {
+                "sid": sid,
+                "slastname": last,
+                "sfirstname": first,
+                "sex": rng.choice("MF"),
+                "age": 16 + year_of_study + rng.randint(1, 6),
+                "dcode": dcode,
+                "yearofstudy": year_of_study,
+            }
+
+    def instructors(self) -> Iterator[Dict[str, Any]]:
+        rng = self._random("instructors")
+        degrees, weights = list(DEGREES), list(DEGREES.values())
+        for iid, dcode in enumerate(self.instructor_departments, start=1):
+            first, last = self._name(rng)
+            yield {
+                "iid": iid,
+                "ilastname": last,
+                "ifirstname": first,
+                "idegree": rng.choices(degrees, weights)[0],
+                "dcode": dcode,
+            }
+
+    def courses(self) -> Iterator[Dict[str, Any]]:
+        rng = self._random("courses")
+        for cid, dcode in self.course_keys:
+            yield {
+                "cid": cid,
+                "dcode": dcode,
+                "cname": f"{rng.choice(COURSE_TOPICS)} {dcode} {cid}",
+            }
+
+    def prerequisites(self) -> Iterator[Dict[str, Any]]:
+        """
+        Streams a prerequisite DAG: courses only require (up to two)
+        courses of the same department with smaller course numbers.
+        """
+        rng = self._random("prerequisites")
+        earlier = {dcode: [] for dcode in self.department_codes}
+        for cid, dcode in self.course_keys:
+            candidates = earlier[dcode]
+            count = min(len(candidates), rng.choice((0, 0, 1, 1, 2)))
+            for pcid in sorted(rng.sample(candidates, count)):
+                yield {
+                    "cid": cid, "dcode": dcode, "pcid": pcid, "pdcode": dcode
+                }
+            candidates.append(cid)
+
+    def course_sections(self) -> Iterator[Dict[str, Any]]:
+        rng = self._random("course_sections")
+        by_department = {dcode: [] for dcode in self.department_codes}
+        for iid, dcode in enumerate(self.instructor_departments, start=1):
+            by_department[dcode].append(iid)
+        instructors = range(1, self.counts["instructors"] + 1)
+        for csid, cid, dcode, year, semester, section in self.section_keys:
+            yield {
+                "csid": csid,
+                "cid": cid,
+                "dcode": dcode,
+                "year": year,
+                "semester": semester,
+                "section": section,
+                "iid": rng.choice(by_department[dcode] or instructors),
+            }
+
+    def enrollments(self) -> Iterator[Dict[str, Any]]:
+        """
+        Streams the enrollments of each section: mostly students of the
+        course's department, with normally distributed grades.
+        """
+        rng = self._random("enrollments")
+        by_department = {dcode: [] for dcode in self.department_codes}
+        for sid, dcode in enumerate(self.student_departments, start=1):
+            by_department[dcode].append(sid)
+        students = range(1, self.counts["students"] + 1)
+        for csid, _, dcode, _, _, _ in self.section_keys:
+            size = min(rng.randint(*SECTION_SIZE), len(students))
+            majors = by_department[dcode]
+            enrolled = set(rng.sample(
+                majors, min(len(majors), round(size * MAJOR_SHARE))
+            ))
+            while len(enrolled) < size:
+                enrolled.add(rng.choice(students))
+            for sid in sorted(enrolled):
+                grade = min(100, max(0, round(
+                    rng.gauss(GRADE_MEAN, GRADE_STDDEV)
+                )))
+                yield {"sid": sid, "csid": csid, "grade": grade}
+
+    def fixtures(self) -> List[Tuple[Any, Iterator[Dict[str, Any]]]]:
+        """
+        Returns a stream for every table, as (model, data) pairs in `MODELS`
+        order, ready to be loaded with `copy_instances()`.
+        """
+        return [
+            (Department, self.departments()),
+            (Student, self.students()),
+            (Instructor, self.instructors()),
+            (Course, self.courses()),
+            (CourseSection, self.course_sections()),
+            (StudentCourse, self.enrollments()),
+            (Prerequisites, self.prerequisites()),
+        ]
+
+
+def load_generated_data(scale: float = 1.0, seed: int = 0) -> Dict[str, int]:
+    """
+    Loads the data `RegistrarGenerator` generates at `scale` with `seed`
+    into the (empty) tables, and analyses each of them so that the planner
+    sees their real size. Returns the number of rows loaded per model name.
+    Call it inside a transaction that is rolled back to undo it.
+    """
+    rows = {}
+    for model, data in RegistrarGenerator(scale, seed).fixtures():
+        rows[model.__name__] = copy_instances(model, data)
+        db.execute_sql(f"ANALYZE {quoted_table_name(model)}")
+    return rows
@@ -0,0 +1,146 @@
+import atexit
+import collections
+import contextlib
+import functools
+import json
+import logging
+import threading
+import time
+
+from typing import Any, Dict
+
+# Log where the time of each test case went (see `PhaseTimings`) at exit
+TIME_PHASES = True
+
+# Also write the timings, per test case and per test, as JSON to this path
+PHASE_TIMINGS_JSON = None
+
+
+class PhaseTimings:
+    """
+    Accumulates the time spent in each phase of the tests (creating
+    fixtures, executing the query, fetching results, cleaning up), per test
+    and per test case class. Class methods (like `_create_instances()`)
+    called while a test runs count towards `current_test`; time spent
+    outside a test (e.g. creating the baseline fixtures in `setUpClass`) is
+    counted under the test case only. Phases nest (`_execute_query()` may
+    create the fixtures it deferred), and a phase only counts the time not
+    spent in the phases within it, so that the phases add up to the time
+    the tests took.
+    """
+
+    def __init__(self):
+        # The test running, set by `SqlQueriesTestCaseMixin` between
+        # `_begin_isolation()` and `_end_isolation()`
+        self.current_test = None
+        self.by_class = collections.defaultdict(
+            lambda: collections.defaultdict(lambda: [0, 0.0])
+        )
+        self.by_test = collections.defaultdict(
+            lambda: collections.defaultdict(float)
+        )
+        # Per thread, the time spent in the phases nested in each phase
+        # being measured, innermost last
+        self._nested = threading.local()
+
+    def record(self, owner, phase: str, seconds: float):
+        """
+        Records `seconds` spent in `phase` by `owner`, a test or a test case
+        class.
+        """
+        if isinstance(owner, type):
+            cls = owner
+            test = self.current_test
+            if not isinstance(test, owner):
+                test = None
+        else:
+            cls, test = type(owner), owner
+        totals = self.by_class[f"{cls.__module__}.{cls.__name__}"][phase]
+        totals[0] += 1
+        totals[1] += seconds
+        if test is not None and hasattr(test, "id"):
+            self.by_test[test.id()][phase] += seconds
+
+    @contextlib.contextmanager
+    def measure(self, owner, phase: str):
+        """
+        Records the time the block takes as `phase` of `owner` (see
+        `record()`), less the time of the phases measured within it.
+        """
+        if not hasattr(self._nested, "stack"):
+            self._nested.stack = []
+        stack = self._nested.stack
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.record(owner, phase, elapsed - nested)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "classes": {
+                name: {
+                    phase: {"calls": calls, "seconds": seconds}
+                    for phase, (calls, seconds) in phases.items()
+                }
+                for name, phases in self.by_class.items()
+            },
+            "tests": {
+                test: dict(phases) for test, phases in self.by_test.items()
+            },
+        }
+
+    def __str__(self):
+        phases = sorted({
+            phase for totals in self.by_class.values() for phase in totals
+        })
+        rows = [["test case"] + phases + ["total"]]
+        for name, totals in sorted(self.by_class.items()):
+            seconds = [totals[phase][1] if phase in totals else 0.0
+                       for phase in phases]
+            rows.append(
+                [name.rsplit(".", 1)[-1]]
+                + [f"{1000 * value:.1f}ms" for value in seconds + [sum(seconds)]]
+            )
+        widths = [max(len(row[index]) for row in rows)
+                  for index in range(len(rows[0]))]
+        return "Time spent per phase\n" + "\n".join(
+            "  ".join(cell.rjust(width) if index else cell.ljust(width)
+                      for index, (cell, width) in enumerate(zip(row, widths)))
+            for row in rows
+        )
+
+
+phase_timings = PhaseTimings()
+
+
+def timed(phase: str):
+    """
+    Decorates a method of `SqlQueriesTestCaseMixin` (or a class method, when
+    applied under `@classmethod`) so that the time it takes is recorded as
+    `phase` of the test or test case it runs for.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(owner, *args, **kwargs):
+            if not TIME_PHASES:
+                return method(owner, *args, **kwargs)
+            with phase_timings.measure(owner, phase):
+                return method(owner, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@atexit.register
+def _log_phase_timings():
+    if not TIME_PHASES or not phase_timings.by_class:
+        return
+    logging.info(phase_timings)
+    if PHASE_TIMINGS_JSON:
+        with open(PHASE_TIMINGS_JSON, "w") as file:
+            json.dump(phase_timings.as_dict(), file, indent=2)
@@ -0,0 +1,95 @@
+import array
+
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def require_numpy():
+    """
+    Raises an `ImportError` explaining how to get NumPy if it is missing.
+    """
+    if numpy is None:
+        raise ImportError(
+            "Vectorised assertions need NumPy, install it with "
+            "`pipenv install --dev`"
+        )
+
+
+def as_array(values: Sequence, numeric: bool = False):
+    """
+    Returns `values` (a column of a `ColumnarTable`, or any sequence) as a
+    NumPy array. Typed integer arrays are wrapped without copying. When
+    `numeric` is set, values (including `Decimal`s) are converted to floats
+    with NULLs as NaN, so they can be compared with tolerances. Otherwise
+    NULLs stay None in an object array (see `sort_values()`).
+    """
+    require_numpy()
+    if isinstance(values, array.array):
+        return numpy.frombuffer(values, dtype=values.typecode)
+    if numeric:
+        return numpy.array(
+            [numpy.nan if value is None else float(value) for value in values],
+            dtype=float
+        )
+    converted = numpy.empty(len(values), dtype=object)
+    converted[:] = list(values)
+    return converted
+
+
+def sort_values(values):
+    """
+    Returns `values` (an array from `as_array()`) sorted, with NULLs last.
+    Object arrays cannot be sorted with None among their values, so these
+    are set apart and appended after the sorted rest.
+    """
+    if values.dtype != object:
+        return numpy.sort(values)
+    nulls = numpy.equal(values, None)
+    return numpy.concatenate([numpy.sort(values[~nulls]), values[nulls]])
+
+
+def group_extrema(
+        keys: Sequence,
+        values: Sequence
+) -> Dict[Any, Tuple[Optional[float], Optional[float]]]:
+    """
+    Returns, for each distinct value of `keys`, the minimum and maximum of
+    the corresponding `values`, computed in a single pass with unbuffered
+    ufunc reductions rather than a Python loop over the rows. As with SQL's
+    MIN and MAX, NULL values are ignored (a group with only NULLs gets
+    (None, None)), and NULL keys form a group of their own.
+    """
+    key_array = as_array(keys)
+    value_array = as_array(values, numeric=True)
+    if key_array.dtype == object:
+        # None cannot be ordered against the other keys, so NULL keys are
+        # set apart and numbered after the other groups
+        nulls = numpy.equal(key_array, None)
+        groups, inverse = numpy.unique(
+            key_array[~nulls], return_inverse=True
+        )
+        codes = numpy.full(len(key_array), len(groups))
+        codes[~nulls] = inverse
+        groups = list(groups) + ([None] if nulls.any() else [])
+        inverse = codes
+    else:
+        groups, inverse = numpy.unique(key_array, return_inverse=True)
+    minimums = numpy.full(len(groups), numpy.inf)
+    maximums = numpy.full(len(groups), -numpy.inf)
+    # Unlike minimum and maximum, fmin and fmax skip NaN (NULL) values
+    numpy.fmin.at(minimums, inverse, value_array)
+    numpy.fmax.at(maximums, inverse, value_array)
+    has_values = numpy.bincount(
+        inverse, weights=~numpy.isnan(value_array), minlength=len(groups)
+    ) > 0
+    return {
+        group.item() if hasattr(group, "item") else group:
+            (low, high) if valid else (None, None)
+        for group, low, high, valid in zip(
+            groups, minimums.tolist(), maximums.tolist(), has_values.tolist()
+        )
+    }
@@ -0,0 +1,60 @@
+import threading
+import time
+import psycopg2
+
+from typing import Optional
+from test.utils.database import *
+
+
+def cancel_backend(pid: int) -> bool:
+    """
+    Cancels the statement that the backend `pid` is running, over a new
+    connection (the one running it is busy waiting for it). Returns whether
+    the backend could be signalled.
+    """
+    connection = psycopg2.connect(database=db.database, **db.connect_params)
+    try:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_cancel_backend(%s)", (pid,))
+            return cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+
+class QueryWatchdog:
+    """
+    Cancels whatever the backend `pid` is running if the block the watchdog
+    is entered for takes more than `timeout` seconds (None never cancels).
+    `cancelled` tells whether it did, and `elapsed` how long the block took.
+    """
+
+    def __init__(self, pid: int, timeout: Optional[float]):
+        self.pid = pid
+        self.timeout = timeout
+        self.cancelled = False
+        self.elapsed = None
+        self._lock = threading.Lock()
+        self._finished = False
+        self._timer = None
+
+    def _cancel(self):
+        with self._lock:
+            # The block may have finished while the timer was firing
+            if not self._finished:
+                self.cancelled = cancel_backend(self.pid)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        if self.timeout is not None:
+            self._timer = threading.Timer(self.timeout, self._cancel)
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._lock:
+            self._finished = True
+        if self._timer is not None:
+            self._timer.cancel()
+        self.elapsed = time.perf_counter() - self._start